@@ -0,0 +1,877 @@
+import importlib
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional, Union, cast
+
+from kivy.animation import Animation
+from kivy.clock import Clock
+from kivy.config import Config
+from kivy.core.window import Window
+from kivy.core.window._window_sdl2 import _WindowSDL2Storage
+from kivy.core.window.window_sdl2 import WindowSDL
+from kivy.metrics import dp
+from kivy.properties import ObjectProperty
+from kivy.uix.popup import Popup
+from kivymd.app import MDApp
+from kivymd.uix.behaviors import HoverBehavior
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import MDFlatButton, MDIconButton
+from kivymd.uix.datatables import MDDataTable
+from kivymd.uix.label import MDLabel
+from kivymd.uix.scrollview import MDScrollView
+from kivymd.uix.spinner import MDSpinner
+from kivymd.uix.textfield import MDTextField
+from kivymd.uix.toolbar import MDTopAppBar
+
+
+from errors import ShowErrorPopup
+from tasks import TaskScheduler
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+    from follow import FollowState
+    from query import QueryEngine
+    from search import SearchIndex, SortIndex, TimeIndex
+    from stats import StatisticsEngine
+    from store import ColumnStore, StoreEngine
+    from table_model import PagedTable
+    from tasks import CancelToken
+
+Config.set('input', 'mouse', 'mouse,disable_multitouch')
+
+# pandas and the modules built on it take a while to import, they are loaded in the background
+# once the window is shown, reportlab and tkinter only when they are first used
+DATA_MODULES = ("parser", "search", "query", "table_model", "stats")
+
+
+# in der .spec file: from kivy_deps import sdl2, glew
+
+# nord palette
+custom_colors = {
+    "Teal"    : {
+        "500": "#8FBCBB",
+    },
+    "Blue"    : {
+        "500": "#88C0D0",
+    },
+    "BlueGray": {
+        "500": "#81A1C1",
+    },
+    "Indigo"  : {
+        "500": "#5E81AC",
+    },
+    "Red"     : {
+        "500": "#BF616A",
+    },
+    "Orange"  : {
+        "500": "#D08770",
+    },
+    "Yellow"  : {
+        "500": "#EBCB8B",
+    },
+    "Green"   : {
+        "500": "#A3BE8C",
+    },
+    "Purple"  : {
+        "500": "#B48EAD",
+    },
+    "Dark"    : {
+        "StatusBar"     : "3B4252",
+        "AppBar"        : "#3B4252",
+        "Background"    : "#3B4252",
+        "CardsDialogs"  : "#3B4252",
+        "FlatButtonDown": "#4C566A",
+    },
+}
+
+
+# lmao. label in texinput geändert für die datatable cells
+# TextInput:
+#                 id: label
+#                 text: " " + root.text
+#                 readonly: True
+#                 foreground_color:
+#                     (0.92549019607, 0.93725490196, 0.95686274509, 1)
+#                 background_color:
+#                     (0.23137254902, 0.25882352941, 0.32156862745, 1)
+#                 cursor_blink: False
+#                 cursor_color:
+#                     (1, 1, 1, 0)
+#                 font_size: "18 sp"
+#                 hint_text_color:
+#                     (0, 0, 0, 0)
+#                 background_normal: ""
+#                 padding: "0dp", "0dp", "0dp", "0dp"
+#                 padding_y: self.height/2 - self.line_height/2
+
+def mouseEnter(instance: Any) -> None:
+    Window.raise_window()
+Window.bind(on_cursor_enter=mouseEnter)
+
+
+# weil kivy schmutz ist
+class HoverTextInput(HoverBehavior, MDTextField):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # fixes 'HoverTextInput' object has no attribute '_win'
+        self._win = _WindowSDL2Storage()
+
+    def on_enter(self, *args: Any) -> None:
+        WindowSDL.set_system_cursor(self, cursor_name='ibeam')
+
+    def on_leave(self, *args: Any) -> None:
+        WindowSDL.set_system_cursor(self, cursor_name='arrow')
+
+
+class ModifiedPopup(Popup):
+    def __init__(self, allow_manual_dismiss: bool = True, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.allow_manual_dismiss = allow_manual_dismiss
+
+    def on_touch_down(self, touch: Any) -> Any:
+        if self.allow_manual_dismiss:
+            return super().on_touch_down(touch)
+        else:
+            return False
+
+
+
+class LoadedFile(NamedTuple):
+    # everything a load produces, built on the load thread and only assigned to the app on the main thread
+    df: Optional[Union["DataFrame", "ColumnStore"]]
+    search_index: Optional["SearchIndex"]
+    time_index: Optional["TimeIndex"]
+    query_engine: Optional[Union["QueryEngine", "StoreEngine"]]
+    table_model: Optional["PagedTable"]
+    error_message: Optional[ShowErrorPopup]
+
+
+# the engine to cache for the next statistics, the summary line and the columns and rows of every grouping table
+StatisticsResult = tuple["StatisticsEngine", str, list[tuple[list[str], list[tuple[str, ...]]]]]
+# the state for the next poll and the file with the rows read so far
+FollowResult = tuple["FollowState", LoadedFile]
+
+
+def run_on_main_thread(callback: Callable[[], None]) -> None:
+    Clock.schedule_once(lambda dt: callback(), 0)
+
+
+def preload_data_modules() -> None:
+    for name in DATA_MODULES:
+        importlib.import_module(name)
+
+
+def ask_file(save: bool = False, folder: bool = False) -> Any:
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+    if save:
+        return filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF Files", "*.pdf"), ("All Files", "*.*")]
+        )
+    if folder:
+        return filedialog.askdirectory()
+    # several files can be selected at once, they are merged into one table
+    return filedialog.askopenfilenames()
+
+
+class Table(MDApp):
+    spinner_widget = ObjectProperty()
+
+    def build(self) -> Any:
+        # theming
+        for custom_color_name, custom_color_hues in custom_colors.items():
+            for hue, value in custom_color_hues.items():
+                self.theme_cls.colors[custom_color_name].update({hue: value})
+        self.theme_cls.theme_style = "Dark"
+        self.theme_cls.primary_palette = "Indigo"
+
+        # widgets
+        self.popup: Optional[ModifiedPopup] = None
+        self.df: Optional[Union["DataFrame", "ColumnStore"]] = None
+        self.search_index: Optional["SearchIndex"] = None
+        self.time_index: Optional["TimeIndex"] = None
+        self.query_engine: Optional[Union["QueryEngine", "StoreEngine"]] = None
+        self.table_model: Optional["PagedTable"] = None
+        self.data_tables: Any = None
+        self.loaded_paths: Optional[list[str]] = None
+        # statistics of the current frame with their per search cache, rebuilt once the frame changes
+        self.statistics: Optional["StatisticsEngine"] = None
+        # cached column orders of the current frame and the (column, descending) of the last header click
+        self.sort_index: Optional["SortIndex"] = None
+        self.sort_order: Optional[tuple[str, bool]] = None
+        # follow mode: the file is polled and new rows are appended, state only changes on the main thread
+        self.following = False
+        self.follow_state: Optional["FollowState"] = None
+        # loading, searching and exporting run on worker threads, results come back through the Clock
+        self.scheduler = TaskScheduler(run_on_main_thread)
+        self.popup_text = ""
+        self.popup_text_trigger = Clock.create_trigger(self.apply_popup_text)
+        self.spinner_widget = MDSpinner(
+            size_hint=(None, None),
+            size=(dp(46), dp(46)),
+            pos_hint={'center_x': .5, 'center_y': .5},
+            active=True,
+            palette=[[0.28627450980392155, 0.8431372549019608, 0.596078431372549, 1],
+                     [0.3568627450980392, 0.3215686274509804, 0.8666666666666667, 1],
+                     [0.8862745098039215, 0.36470588235294116, 0.592156862745098, 1],
+                     [0.8784313725490196, 0.9058823529411765, 0.40784313725490196, 1],
+                     ]
+        )
+        self.popup_label = MDLabel(
+            text="...",
+            text_size=(None, None),
+            halign="center",
+        )
+        self.cancel_button = MDFlatButton(
+            text="Abbrechen",
+            pos_hint={'center_x': .5},
+            on_release=self.cancel_tasks,
+        )
+        self.search_bar = HoverTextInput(
+            hint_text="Suche",
+            size_hint_x=2.25,
+            pos_hint={"y": 0.6},
+            icon_right='magnify',
+            detect_visible=False,
+        )
+        self.toolbar = MDTopAppBar(
+            title="Anrufe",
+            right_action_items=[["text-box-plus-outline", self.load_table, "CSV Datei"],
+                                ["folder-open-outline", self.load_folder, "CSV Ordner"],
+                                ["eye-outline", self.toggle_follow, "Live verfolgen"],
+                                ["chart-bar", self.show_statistics, "Statistik"],
+                                ["help-circle-outline", self.show_help, "Hilfe"],
+                                ["file-pdf-box", self.export_as_pdf, "Exportieren"]],
+            md_bg_color="#2E3440"
+        )
+        self.toolbar.children[0].size_hint = (0.4, None)
+        self.toolbar.children[0].add_widget(self.search_bar)
+        self.search_bar.bind(text=self.search_bar_callback)
+
+        # layouts
+        self.popup_layout = MDBoxLayout(orientation='vertical')
+        self.boxlayout = MDBoxLayout(
+            orientation='vertical',
+        )
+        self.boxlayout.add_widget(self.toolbar)
+
+        self.scroll_view = MDScrollView(
+            scroll_type=['bars'],
+            bar_width=dp(10),
+            scroll_distance=dp(30),
+        )
+        self.boxlayout.add_widget(self.scroll_view)
+
+        # eigene Seitensteuerung, die Tabelle bekommt immer nur die sichtbare Seite
+        self.page_label = MDLabel(
+            text="",
+            halign="right",
+            font_style="Caption",
+        )
+        self.page_back = MDIconButton(
+            icon="chevron-left",
+            disabled=True,
+            pos_hint={'center_y': .5},
+            on_release=lambda *args: self.change_page(-1),
+        )
+        self.page_forward = MDIconButton(
+            icon="chevron-right",
+            disabled=True,
+            pos_hint={'center_y': .5},
+            on_release=lambda *args: self.change_page(1),
+        )
+        self.pagination = MDBoxLayout(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(48),
+            padding=(dp(16), 0),
+            spacing=dp(8),
+        )
+        self.pagination.add_widget(self.page_label)
+        self.pagination.add_widget(self.page_back)
+        self.pagination.add_widget(self.page_forward)
+        self.boxlayout.add_widget(self.pagination)
+
+        Window.size = (dp(1130), Window.size[1])
+        return self.boxlayout
+
+    def on_start(self) -> None:
+        threading.Thread(target=preload_data_modules, daemon=True).start()
+
+    def on_stop(self) -> None:
+        self.scheduler.shutdown()
+
+    def set_popup_text(self, text: str) -> None:
+        # called from worker threads, the label is only updated on the main thread and at most once per frame
+        self.popup_text = text
+        self.popup_text_trigger()
+
+    def apply_popup_text(self, *args: Any) -> None:
+        self.popup_label.text = self.popup_text
+
+    def cancel_tasks(self, *args: Any) -> None:
+        self.scheduler.cancel("load")
+        self.scheduler.cancel("export")
+        if self.popup:
+            self.popup.dismiss()
+
+    def show_help(self, *args: Any, **kwargs: Any) -> None:
+        self.popup_layout.add_widget(
+            MDLabel(
+                markup=True,
+                text="""[ref=top][size=24]Allgemein[/size][/ref]
+
+- Über den Button oben rechts lassen sich die Telefoniedaten CSV-Dateien einlesen.
+- Mehrere Dateien oder ein ganzer Ordner werden zu einer Tabelle zusammengeführt, doppelte Anrufe nur einmal angezeigt.
+- Mit dem Auge wird eine geladene Datei live verfolgt, neu geschriebene Anrufe erscheinen ohne neues Laden.
+- Dateien, die nicht in den Arbeitsspeicher passen, werden einmalig umgewandelt und blockweise durchsucht;
+  Sortieren, Statistik und Live-Verfolgung gibt es für sie nicht (Grenze: CDR_VIEWER_MEMORY_LIMIT in MB).
+- Die Statistik zeigt für die aktuelle Suche Anrufe je Anrufer, je Stunde und die Gesprächszeit je Gerät.
+- Ein Klick auf eine Spaltenüberschrift sortiert das ganze Suchergebnis, ein weiterer Klick dreht die Reihenfolge um.
+- Auftretende (Fehler-)Meldungen können mit einem Mausklick an beliebiger Stelle geschlossen werden
+
+[ref=top][size=24]Suchfunktion[/size][/ref]
+
+- Ohne Beschränkung: Es werden alle Zeilen angezeigt, welche den Suchbegriff irgendwo enthalten
+    - Beispiel:
+        - 90123 -> Alle Zeilen, die irgendwo diese Zeichenfolge beinhaltet
+
+- Mit Beschränkung auf Spalten: Es werden alle Zeilen angezeigt, welche den Suchbegriff irgendwo in der entsprechenden Spalte enthalten
+    - Beispiel:
+        - "Spaltenname":"Suchbegriff"
+        - Anrufer:90123 -> Alle Zeilen, welche bei "Anrufer" irgendwo "90123" enthalten
+
+- Platzhalter: * steht für beliebig viele Zeichen, ? für genau ein Zeichen; der Suchbegriff muss dann den ganzen Wert abdecken
+    - Beispiel:
+        - Verbunden um:10:* -> Alle Zeilen, die zwischen 10:00 und 10:59 verbunden wurden
+        - Gerät:sep* -> Alle Geräte, deren Name mit "sep" beginnt
+        - Anrufer:*12?4 -> Alle Anrufer, deren Nummer mit 12, einer beliebigen Ziffer und 4 endet
+
+- Vergleiche: Zeitstempel, Verbunden um und Dauer lassen sich mit >, >=, <, <= und = vergleichen
+    - Beispiel:
+        - Dauer>00:05:00 -> Alle Gespräche, die länger als fünf Minuten gedauert haben
+        - Zeitstempel<14.03.24 -> Alle Anrufe vor dem 14.03.24
+
+- Bereiche: von..bis, beide Enden einschließlich, ein Ende darf fehlen
+    - Beispiel:
+        - Zeitstempel:14.03.24..15.03.24 -> Alle Anrufe am 14. und 15.03.24
+        - Zeitstempel:09:00..11:00 -> Alle Anrufe zwischen 09:00 und 11:00 Uhr, an jedem Tag
+        - Dauer:..00:00:10 -> Alle Gespräche bis zu zehn Sekunden
+
+- Verknüpfen: Suchbegriffe mit UND bzw. ODER verbinden, UND bindet stärker als ODER
+    - Beispiel:
+        - Gerät:sep UND Dauer>00:05:00 -> Lange Gespräche von Geräten, die "sep" enthalten
+        - Anrufer:90123 ODER Gewählte Nummer:90123 -> Alle Anrufe von oder an 90123
+"""
+            )
+        )
+        self.popup = ModifiedPopup(
+            title='Hilfe',
+            content=self.popup_layout,
+            size_hint=(.7, .7),
+            pos_hint={'center_x': .5, 'center_y': .5},
+            separator_height=0,
+            background_color=(1, 1, 1, 0),
+            allow_manual_dismiss=True
+        )
+        self.popup.bind(on_dismiss=self.close_popup)
+        Animation(opacity=0.5, d=0.5).start(self.boxlayout)
+        self.popup.open()
+
+    def export_as_pdf(self, *args: Any, **kwargs: Any) -> None:
+        file = ask_file(save=True)
+        if file:
+            if self.table_model:
+                # rendering takes a while for big results, keep the UI responsive and show the progress
+                self.show_popup(loading=True)
+                table_model = self.table_model
+                self.scheduler.submit("export", lambda token: self.export_pdf(file, table_model, token),
+                                      self.show_export_result)
+            else:
+                self.show_info("Keine Daten geladen")
+
+    def export_pdf(self, file: str, table_model: "PagedTable", token: "CancelToken") -> str:
+        def update_popup_text(text: str) -> None:
+            # abbrechen zwischen zwei Seiten, die Datei wird erst am Ende geschrieben
+            token.check()
+            self.set_popup_text(text)
+
+        try:
+            from export import create_pdf as export
+
+            export([table_model.column_data, table_model.iter_rows()], file, callback=update_popup_text,
+                   total=len(table_model))
+            return "PDF gespeichert unter:\n" + file
+        except Exception as e:
+            return f"PDF konnte nicht gespeichert werden: {str(e)}"
+
+    def show_export_result(self, pop_text: str) -> None:
+        if self.popup:
+            self.popup.dismiss()
+            self.popup_layout.clear_widgets()
+        self.show_info(pop_text)
+
+    def show_info(self, pop_text: str) -> None:
+        self.popup_layout.add_widget(
+            MDLabel(
+                markup=True,
+                text=pop_text
+            )
+        )
+        self.popup = ModifiedPopup(
+            title='Info',
+            content=self.popup_layout,
+            size_hint=(.7, .7),
+            pos_hint={'center_x': .5, 'center_y': .5},
+            separator_height=0,
+            background_color=(1, 1, 1, 0),
+            allow_manual_dismiss=True
+        )
+        self.popup.bind(on_dismiss=self.close_popup)
+        Animation(opacity=0.5, d=0.5).start(self.boxlayout)
+        self.popup.open()
+
+    def create_table_widget(self, table_model: "PagedTable") -> None:
+        from parser import column_name_mapping
+
+        self.table_model = table_model
+        if self.data_tables is None:
+            self.data_tables = MDDataTable(
+                column_data=[(name, dp(width), self.header_sort(column))
+                             for (name, width), column in zip(table_model.column_data, column_name_mapping.values())],
+                row_data=table_model.page_rows(),
+                rows_num=table_model.page_size,
+                # background_color_cell = "#4C566A",
+                background_color_selected_cell="#434C5E",
+                background_color_header="#4C566A",
+                # background_color="#4C566A",
+            )
+            # self.data_tables.bind(on_check_press=self.on_row_press)
+        else:
+            self.data_tables.update_row_data(self.data_tables, table_model.page_rows())
+        self.update_pagination()
+        if self.data_tables.parent is None:
+            self.scroll_view.clear_widgets()
+            self.scroll_view.add_widget(self.data_tables)
+
+    def header_sort(self, column: str) -> Callable[[list[Any]], tuple[list[int], list[Any]]]:
+        # MDDataTable only hands the rows of the shown page to the sort function (and flips them itself every
+        # other click); they go back unchanged and the whole result is sorted on the typed values instead,
+        # its first page then replaces the rows
+        def sort(data: list[Any]) -> tuple[list[int], list[Any]]:
+            Clock.schedule_once(lambda dt: self.sort_by_column(column), 0)
+            return list(range(len(data))), list(data)
+
+        return sort
+
+    def sort_by_column(self, column: str) -> None:
+        if self.table_model is None:
+            return
+        if self.search_index is None:
+            self.show_info("Sortieren ist für Dateien, die nicht in den Speicher passen, nicht möglich")
+            return
+        # the same column again flips the direction
+        self.sort_order = column, self.sort_order == (column, False)
+        self.sort_table()
+
+    def sort_table(self) -> None:
+        table_model, sort = self.table_model, self.search_sort()
+        if table_model is None or sort is None or table_model.df is not self.df:
+            # follow mode just brought new rows, the refresh that is on its way sorts them
+            return
+        sort_index, column, descending = sort
+        self.scheduler.submit(
+            "sort", lambda token: table_model.sorted(sort_index, column, descending),
+            lambda sorted_model: self.create_table_widget(sorted_model) if self.table_model is table_model else None
+        )
+
+    def search_sort(self) -> Optional[tuple["SortIndex", str, bool]]:
+        # (sort index, column, descending) for sorting a new search result like the table, None while unsorted
+        from search import SortIndex
+
+        if self.sort_order is None or self.search_index is None or self.time_index is None:
+            return None
+        # per frame, the order of a column is only computed when it is first sorted on
+        if self.sort_index is None or self.sort_index.df is not self.df:
+            # frames loaded into memory are the only ones with a search index
+            self.sort_index = SortIndex(cast("DataFrame", self.df), [self.time_index])
+        return (self.sort_index, *self.sort_order)
+
+    def change_page(self, step: int) -> None:
+        if self.table_model:
+            self.table_model.set_page(self.table_model.page + step)
+            self.data_tables.update_row_data(self.data_tables, self.table_model.page_rows())
+            self.update_pagination()
+
+    def update_pagination(self) -> None:
+        if self.table_model is None:
+            return
+        self.page_label.text = self.table_model.page_label()
+        self.page_back.disabled = not self.table_model.has_previous()
+        self.page_forward.disabled = not self.table_model.has_next()
+
+    def search_bar_callback(self, instance: Any, *args: Any) -> None:
+        # Cancel any previous scheduled events
+        if hasattr(self, '_search_event'):
+            Clock.unschedule(self._search_event)
+
+        # Schedule a new event to happen in 3 seconds
+        self._search_event: Any = Clock.schedule_once(
+            lambda dt: self.filter_data(instance),
+            0.5
+        )
+
+    def filter_data(self, instance: Any, *args: Any) -> None:
+        # extra check wegen der verzögerung um 0.5 sekunden
+        if self.search_bar.text == instance.text:
+            filter_text = instance.text
+            if not filter_text.isspace():
+                if self.query_engine is not None:
+                    # Spalte:Begriff, Wildcards, Dauer>00:05:00, Zeitstempel:14.03.24..15.03.24, mit UND/ODER verknüpft;
+                    # läuft im Hintergrund, ein neuer Suchbegriff verwirft die Ergebnisse der alten Suche
+                    engine, df, sort = self.query_engine, self.df, self.search_sort()
+                    self.scheduler.submit(
+                        "search", lambda token: self.search(engine, df, filter_text, token.check, sort),
+                        self.show_search_result, self.show_search_error
+                    )
+
+    @staticmethod
+    def search(engine: Union["QueryEngine", "StoreEngine"], df: Union["DataFrame", "ColumnStore"], filter_text: str,
+               check: Optional[Callable[[], None]] = None,
+               sort: Optional[tuple["SortIndex", str, bool]] = None) -> "PagedTable":
+        from table_model import PagedTable
+
+        table_model = PagedTable(df, engine.search(filter_text, check), query=filter_text.strip())
+        # the result keeps the order of the last header click
+        return table_model.sorted(*sort) if sort else table_model
+
+    def show_search_result(self, table_model: "PagedTable") -> None:
+        self.update_ui(table_model, None)
+        if self.sort_order is not None and table_model.sort_order != self.sort_order:
+            # a header was clicked while the search was running
+            self.sort_table()
+
+    def show_search_error(self, error: BaseException) -> None:
+        from query import QueryError
+
+        message = str(error) if isinstance(error, QueryError) else f"Suche fehlgeschlagen: {str(error)}"
+        self.show_popup(msg=ShowErrorPopup("Fehler", message))
+
+    def show_statistics(self, *args: Any, **kwargs: Any) -> None:
+        if self.table_model is None:
+            self.show_info("Keine Daten geladen")
+            return
+        if self.search_index is None:
+            self.show_info("Statistik ist für Dateien, die nicht in den Speicher passen, nicht möglich")
+            return
+        table_model, engine = self.table_model, self.statistics
+        self.scheduler.submit("statistics", lambda token: self.compute_statistics(table_model, engine),
+                              self.open_statistics, self.show_statistics_error)
+
+    @staticmethod
+    def compute_statistics(table_model: "PagedTable", engine: Optional["StatisticsEngine"]) -> StatisticsResult:
+        import numpy as np
+
+        from stats import GROUP_NAMES, StatisticsEngine, convert_statistics_table, describe
+
+        # cached per search, a narrower search than the last one only subtracts the dropped rows
+        if engine is None or engine.df is not table_model.df:
+            engine = StatisticsEngine(table_model.df)
+        statistics = engine.statistics(table_model.query, np.asarray(table_model.rows))
+        tables = [convert_statistics_table(engine.table(statistics, grouping)) for grouping in GROUP_NAMES]
+        return engine, describe(statistics), tables
+
+    def open_statistics(self, result: StatisticsResult) -> None:
+        self.statistics, summary, tables = result
+        self.popup_layout.add_widget(MDLabel(text=summary, size_hint_y=None, height=dp(48)))
+        tables_layout = MDBoxLayout(orientation='horizontal', spacing=dp(8))
+        for columns, rows in tables:
+            tables_layout.add_widget(
+                MDDataTable(
+                    column_data=[(name, dp(35) if i == 0 else dp(22)) for i, name in enumerate(columns)],
+                    row_data=rows,
+                    use_pagination=True,
+                    rows_num=10,
+                    background_color_selected_cell="#434C5E",
+                    background_color_header="#4C566A",
+                )
+            )
+        self.popup_layout.add_widget(tables_layout)
+        self.popup = ModifiedPopup(
+            title='Statistik',
+            content=self.popup_layout,
+            size_hint=(.95, .9),
+            pos_hint={'center_x': .5, 'center_y': .5},
+            separator_height=0,
+            background_color=(1, 1, 1, 0),
+            allow_manual_dismiss=True
+        )
+        self.popup.bind(on_dismiss=self.close_popup)
+        Animation(opacity=0.5, d=0.5).start(self.boxlayout)
+        self.popup.open()
+
+    def show_statistics_error(self, error: BaseException) -> None:
+        self.show_popup(msg=ShowErrorPopup("Fehler", f"Statistik fehlgeschlagen: {str(error)}"))
+
+    def load_table(self, *args: Any, **kwargs: Any) -> None:
+        files = list(ask_file())
+        if files:
+            if not all(file.endswith('.csv') for file in files):
+                # Cancel any previously scheduled layout events
+                Clock.unschedule(self.popup_layout.do_layout)
+                self.show_popup(msg=ShowErrorPopup("Fehler", "Datei ist keine CSV-Datei"))
+            else:
+                self.start_load(files)
+
+    def load_folder(self, *args: Any, **kwargs: Any) -> None:
+        folder = ask_file(folder=True)
+        if folder:
+            self.start_load([folder])
+
+    def start_load(self, paths: list[str]) -> None:
+        # the current table stays until the new files are loaded, a cancelled load leaves it untouched
+        self.stop_follow()
+        self.show_popup(loading=True)
+        self.scheduler.cancel("search")
+        self.scheduler.submit("load", lambda token: self.load_data(paths, token),
+                              lambda loaded: self.finish_load(loaded, paths), self.show_load_error)
+
+    def show_load_error(self, error: BaseException) -> None:
+        self.update_ui(None, ShowErrorPopup("Fehler", f"Datei kann nicht geladen werden: {str(error)}"))
+
+    def load_data(self, paths: list[str], token: "CancelToken") -> LoadedFile:
+        # runs on the load thread, widgets and app state are only touched in finish_load
+        from parser import load_files as parse
+        from store import needs_store
+
+        if len(paths) == 1 and os.path.isfile(paths[0]) and needs_store(paths[0]):
+            return self.open_out_of_core(paths[0], token)
+        # several files or a folder end up as one table in time order, repeated call records are dropped;
+        # the cancel token doubles as progress hook and stops the parser between two chunks
+        df, error_message = parse(paths, callback=self.set_popup_text, as_dataframe=True, hooks=[token.check])
+        if error_message:
+            return LoadedFile(None, None, None, None, None, error_message)
+        # built once per file, every later search only does lookups
+        self.set_popup_text("Erstelle Suchindex...")
+        return self.build_loaded(df, token)
+
+    def open_out_of_core(self, file: str, token: "CancelToken") -> LoadedFile:
+        # too big for memory: converted once into a memory mapped column store, searches scan it block by block
+        from parser import column_name_mapping
+        from store import StoreEngine, open_store
+        from table_model import PagedTable
+
+        store = open_store(file, callback=self.set_popup_text, hooks=[token.check])
+        return LoadedFile(store, None, None, StoreEngine(store, column_name_mapping),
+                          PagedTable(store, range(len(store))), None)
+
+    @staticmethod
+    def build_loaded(df: "DataFrame", token: "CancelToken") -> LoadedFile:
+        from parser import column_name_mapping
+        from query import QueryEngine
+        from search import SearchIndex, TimeIndex
+        from table_model import PagedTable
+
+        search_index = SearchIndex(df, list(column_name_mapping.values()))
+        token.check()
+        time_index = TimeIndex(df["dateTimeOrigination"])
+        query_engine = QueryEngine(df, search_index, column_name_mapping, [time_index])
+        return LoadedFile(df, search_index, time_index, query_engine, PagedTable(df), None)
+
+    def finish_load(self, loaded: LoadedFile, paths: list[str]) -> None:
+        if loaded.error_message:
+            self.update_ui(None, loaded.error_message)
+            return
+        self.df, self.search_index, self.time_index, self.query_engine = loaded[:4]
+        self.loaded_paths = paths
+        self.sort_order = None
+        self.update_ui(loaded.table_model, None)
+        if loaded.search_index is None:
+            # switched to the out-of-core store on its own, say what that costs
+            from store import MEMORY_LIMIT
+
+            self.show_info(
+                f"Die Datei ist zu groß für den Arbeitsspeicher (Grenze {MEMORY_LIMIT // 1024 ** 2} MB) und wird "
+                "blockweise von der Festplatte durchsucht.\n"
+                "Sortieren, Statistik und Live-Verfolgung sind dafür nicht verfügbar.\n"
+                "Die Grenze lässt sich über die Umgebungsvariable CDR_VIEWER_MEMORY_LIMIT (in MB) anheben."
+            )
+
+    def loaded_file(self) -> LoadedFile:
+        return LoadedFile(self.df, self.search_index, self.time_index, self.query_engine, self.table_model, None)
+
+    def toggle_follow(self, *args: Any, **kwargs: Any) -> None:
+        if self.following:
+            self.stop_follow()
+            self.show_info("Live-Verfolgung beendet")
+            return
+        paths = self.loaded_paths or []
+        if self.df is None or len(paths) != 1 or not os.path.isfile(paths[0]):
+            self.show_info("Live-Verfolgung geht nur mit einer einzelnen geladenen Datei")
+            return
+        if self.search_index is None:
+            # out-of-core stores are written once and not extended
+            self.show_info("Live-Verfolgung ist für Dateien, die nicht in den Speicher passen, nicht möglich")
+            return
+        self.following = True
+        loaded = self.loaded_file()
+        self.scheduler.submit("follow", lambda token: self.start_follow(paths[0], loaded, token),
+                              self.apply_follow, self.show_follow_error)
+        self.show_info(f"Live-Verfolgung gestartet, neue Zeilen aus\n{paths[0]}\nwerden laufend angehängt")
+
+    def stop_follow(self) -> None:
+        self.following = False
+        self.follow_state = None
+        self.scheduler.cancel("follow")
+
+    @classmethod
+    def start_follow(cls, file: str, loaded: LoadedFile, token: "CancelToken") -> FollowResult:
+        from follow import attach
+
+        # follow mode is only started on frames loaded into memory
+        loaded_df = cast("DataFrame", loaded.df)
+        state, df = attach(file, loaded_df)
+        if len(df) != len(loaded_df):
+            # the last row was still being written during the load, it comes again once it is complete
+            loaded = cls.build_loaded(df, token)
+        return state, loaded
+
+    @classmethod
+    def poll_follow(cls, state: "FollowState", loaded: LoadedFile, token: "CancelToken") -> FollowResult:
+        # runs on the follow thread and builds extended copies, searches on the current data keep working meanwhile
+        from follow import append_rows, poll
+        from parser import column_name_mapping
+        from query import QueryEngine
+
+        update = poll(state)
+        if update is None:
+            return state, loaded
+        # follow mode is only started on frames loaded into memory, they come with both indexes
+        loaded_df, search_index, time_index = cast(tuple["DataFrame", "SearchIndex", "TimeIndex"], loaded[:3])
+        if update.replace:
+            return update.state, cls.build_loaded(update.frame if not update.frame.empty else loaded_df.iloc[:0],
+                                                  token)
+        if update.frame.empty:
+            return update.state, loaded
+        df = append_rows(loaded_df, update.frame)
+        token.check()
+        search_index = search_index.extended(df)
+        time_index = time_index.extended(df["dateTimeOrigination"])
+        query_engine = QueryEngine(df, search_index, column_name_mapping, [time_index])
+        return update.state, LoadedFile(df, search_index, time_index, query_engine, None, None)
+
+    def apply_follow(self, result: FollowResult) -> None:
+        if not self.following:
+            return
+        self.follow_state, loaded = result
+        if loaded.df is not self.df:
+            self.df, self.search_index, self.time_index, self.query_engine = loaded[:4]
+            self.refresh_table()
+        # the next look only once this one is done, a slow poll never piles up behind itself
+        from follow import FOLLOW_INTERVAL
+
+        Clock.schedule_once(self.schedule_poll, FOLLOW_INTERVAL)
+
+    def schedule_poll(self, *args: Any) -> None:
+        if self.following and self.follow_state is not None:
+            state, loaded = self.follow_state, self.loaded_file()
+            self.scheduler.submit("follow", lambda token: self.poll_follow(state, loaded, token),
+                                  self.apply_follow, self.show_follow_error)
+
+    def show_follow_error(self, error: BaseException) -> None:
+        self.stop_follow()
+        self.show_popup(msg=ShowErrorPopup("Fehler", f"Live-Verfolgung beendet: {str(error)}"))
+
+    def refresh_table(self) -> None:
+        # new rows without a reload: the current search runs again and the page stays where it was
+        if self.query_engine is None or self.df is None:
+            return
+        page = self.table_model.page if self.table_model else 0
+        engine, df, filter_text, sort = self.query_engine, self.df, self.search_bar.text, self.search_sort()
+
+        def show(table_model: "PagedTable") -> None:
+            table_model.set_page(page)
+            self.create_table_widget(table_model)
+
+        self.scheduler.submit("search", lambda token: self.search(engine, df, filter_text, token.check, sort), show,
+                              self.show_search_error)
+# TODO: fix bug after not csv file und dann csv laden
+# TODO: windowed copile
+    def update_ui(self, table_model: Optional["PagedTable"], error_message: Optional[ShowErrorPopup]) -> None:
+        if self.popup:
+            self.popup.dismiss()
+            self.popup_layout.clear_widgets()
+        if error_message:
+            self.show_popup(msg=error_message)
+        elif table_model is not None:
+            self.create_table_widget(table_model)
+
+    def show_popup(self, msg: str | ShowErrorPopup = "", loading: bool = False) -> None:
+        # self.popup_layout = MDBoxLayout(orientation='vertical')
+
+        if not loading:
+            self.popup_label.text = msg.title + "\n\n" + msg.message if isinstance(msg, ShowErrorPopup) else msg
+            self.popup_layout.add_widget(self.popup_label)
+        else:
+            self.popup_text = self.popup_label.text = "..."
+            self.popup_layout.add_widget(self.spinner_widget)
+            self.popup_layout.add_widget(self.popup_label)
+            self.popup_layout.add_widget(self.cancel_button)
+            self.spinner_widget.active = True
+
+        self.popup = ModifiedPopup(
+            title='',
+            content=self.popup_layout,
+            size_hint=(.2, .3),
+            pos_hint={'center_x': .5, 'center_y': .5},
+            separator_height=0,
+            background_color=(1, 1, 1, 0),
+            allow_manual_dismiss=not loading
+        )
+        self.popup.bind(on_dismiss=self.close_popup)
+        Animation(opacity=0.5, d=0.5).start(self.boxlayout)
+        self.popup.open()
+
+    def close_popup(self, *args: Any) -> None:
+        self.spinner_widget.active = False
+
+        if self.spinner_widget.parent:
+            self.spinner_widget.parent.remove_widget(self.spinner_widget)
+        if self.popup_label.parent:
+            self.popup_label.parent.remove_widget(self.popup_label)
+        if self.popup_layout.parent:
+            self.popup_layout.parent.remove_widget(self.popup_layout)
+
+        self.popup_layout.clear_widgets()
+        if self.popup:
+            self.popup.clear_widgets()
+
+        anim = Animation(opacity=1, d=0.5)
+        anim.bind(on_complete=lambda *args: Clock.schedule_once(self._set_popup_to_none, 0))
+        anim.start(self.boxlayout)
+
+        # Clear any remaining scheduled events
+        Clock.unschedule(self.popup_layout.do_layout)
+
+    def _set_popup_to_none(self, dt: float) -> None:
+        self.popup = None
+
+
+def main() -> None:
+    # started from GUI.py, which keeps the worker processes of the parser from importing the app
+    DEBUG = False # wenn für console compilation
+    if DEBUG:
+        try:
+            Table().run()
+        except Exception as e:
+            print("An error occurred:", e)
+        finally:
+            input("\nPress Enter to exit...")
+    else:
+        Table().run()
+# TODO: Hilfemenü Copy Paste erklären
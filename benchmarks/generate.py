@@ -0,0 +1,173 @@
+import argparse
+import csv
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# CUCM CDR columns in export order, the viewer only reads some of them but the rest makes up most of the bytes
+COLUMNS = [
+    "cdrRecordType", "globalCallID_callManagerId", "globalCallID_callId", "origLegCallIdentifier",
+    "dateTimeOrigination", "origNodeId", "origSpan", "origIpAddr", "callingPartyNumber",
+    "callingPartyUnicodeLoginUserID", "origCause_location", "origCause_value", "origPrecedenceLevel",
+    "destLegIdentifier", "destNodeId", "destSpan", "destIpAddr", "originalCalledPartyNumber",
+    "finalCalledPartyNumber", "finalCalledPartyUnicodeLoginUserID", "destCause_location", "destCause_value",
+    "dateTimeConnect", "dateTimeDisconnect", "lastRedirectDn", "pkid", "originalCalledPartyNumberPartition",
+    "callingPartyNumberPartition", "duration", "origDeviceName", "destDeviceName",
+]
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+# "mixed" is utf-8 with a run of cp1252 rows late in the file, like exports that were concatenated by hand
+ENCODINGS = ("utf-8", "utf-8-sig", "cp1252", "mixed")
+MIXED_ROWS = (0.7, 0.72)
+DELIMITERS = {"semicolon": ";", "comma": ","}
+
+# rows are generated and written in blocks, each block has its own seed so files are reproducible
+BLOCK_SIZE = 250_000
+START_EPOCH = 1_704_067_200  # 01.01.2024 00:00 UTC
+MEAN_CALL_GAP = 4.0
+UNANSWERED_SHARE = 0.3
+# excel turns long numbers into 4,9301234567E+11 when a CDR file is opened and saved again
+SCIENTIFIC_SHARE = 0.01
+PLACEHOLDER_SHARE = 0.02
+EMPTY_USER_SHARE = 0.4
+EXTENSIONS = 2_000
+EXTERNAL_NUMBERS = 50_000
+USERS = ["müller", "schäfer", "weiß", "jäger", "köhler", "schmidt", "becker", "hoffmann", "wagner", "neumann"]
+
+
+def parse_size(text: str) -> int:
+    return SIZES.get(text.lower()) or int(text.replace("_", ""))
+
+
+def default_name(rows: int, seed: int, encoding: str, delimiter: str) -> str:
+    name = next((key for key, value in DELIMITERS.items() if value == delimiter), "delimiter")
+    return f"cdr_{rows}_{encoding}_{name}_{seed}.csv"
+
+
+def phone_numbers(rng: np.random.Generator, size: int, decimal: str) -> np.ndarray:
+    extensions = (10_000 + rng.integers(0, EXTENSIONS, size)).astype(str)
+    external = np.char.add("+49", (3_000_000_000 + rng.integers(0, EXTERNAL_NUMBERS, size) * 7_919).astype(str))
+    numbers = np.where(rng.random(size) < 0.6, extensions, external).astype(object)
+    scientific = (rng.random(size) < SCIENTIFIC_SHARE) & (numbers != extensions)
+    if scientific.any():
+        digits = [number[1:] for number in numbers[scientific]]
+        numbers[scientific] = [f"{digit[0]}{decimal}{digit[1:]}E+{len(digit) - 1}" for digit in digits]
+    numbers[rng.random(size) < PLACEHOLDER_SHARE] = "\\"
+    return numbers
+
+
+def user_ids(rng: np.random.Generator, size: int) -> np.ndarray:
+    users = np.asarray(USERS, dtype=object)[rng.integers(0, len(USERS), size)]
+    users[rng.random(size) < EMPTY_USER_SHARE] = ""
+    users[rng.random(size) < PLACEHOLDER_SHARE] = "\\"
+    return users
+
+
+def device_names(rng: np.random.Generator, size: int, users: np.ndarray) -> np.ndarray:
+    devices = np.asarray([f"SEP{value:012X}" for value in rng.integers(0, EXTENSIONS, size) * 104_729], dtype=object)
+    softphones = (rng.random(size) < 0.15) & (users != "") & (users != "\\")
+    devices[softphones] = "CSF" + users[softphones]
+    devices[rng.random(size) < 0.1] = ""
+    return devices
+
+
+def generate_block(rng: np.random.Generator, first_row: int, size: int, start: float,
+                   decimal: str) -> tuple[pd.DataFrame, float]:
+    origination = start + np.cumsum(rng.exponential(MEAN_CALL_GAP, size))
+    unanswered = rng.random(size) < UNANSWERED_SHARE
+    connect = np.where(unanswered, 0, origination + rng.integers(0, 30, size)).astype(np.int64)
+    talk = rng.lognormal(4.5, 1.2, size).astype(np.int64)
+    # now and then a call is left open over night
+    talk[rng.random(size) < 1e-4] += 90_000
+    disconnect = np.where(unanswered, origination + rng.integers(0, 45, size), connect + talk).astype(np.int64)
+    calling_users, called_users = user_ids(rng, size), user_ids(rng, size)
+    called = phone_numbers(rng, size, decimal)
+    block = pd.DataFrame({
+        "cdrRecordType": 1,
+        "globalCallID_callManagerId": rng.integers(1, 4, size),
+        "globalCallID_callId": first_row + np.arange(size),
+        "origLegCallIdentifier": 20_000_000 + first_row * 2 + np.arange(size) * 2,
+        "dateTimeOrigination": origination.astype(np.int64),
+        "origNodeId": rng.integers(1, 4, size),
+        "origSpan": 0,
+        "origIpAddr": rng.integers(-2_000_000_000, 2_000_000_000, size),
+        "callingPartyNumber": phone_numbers(rng, size, decimal),
+        "callingPartyUnicodeLoginUserID": calling_users,
+        "origCause_location": 0,
+        "origCause_value": np.where(unanswered, 0, 16),
+        "origPrecedenceLevel": 4,
+        "destLegIdentifier": 20_000_001 + first_row * 2 + np.arange(size) * 2,
+        "destNodeId": rng.integers(1, 4, size),
+        "destSpan": 0,
+        "destIpAddr": rng.integers(-2_000_000_000, 2_000_000_000, size),
+        "originalCalledPartyNumber": called,
+        "finalCalledPartyNumber": called,
+        "finalCalledPartyUnicodeLoginUserID": called_users,
+        "destCause_location": 0,
+        "destCause_value": np.where(unanswered, 19, 16),
+        "dateTimeConnect": connect,
+        "dateTimeDisconnect": disconnect,
+        "lastRedirectDn": called,
+        "pkid": [f"{high:016x}{low:016x}" for high, low in rng.integers(0, 2 ** 63, (size, 2))],
+        "originalCalledPartyNumberPartition": "PT_Internal",
+        "callingPartyNumberPartition": "PT_Internal",
+        "duration": np.where(unanswered, 0, disconnect - connect),
+        "origDeviceName": device_names(rng, size, calling_users),
+        "destDeviceName": device_names(rng, size, called_users),
+    }, columns=COLUMNS)
+    return block, float(origination[-1])
+
+
+def generate(path: str, rows: int, seed: int = 1, encoding: str = "utf-8", delimiter: str = ";",
+             block_size: int = BLOCK_SIZE) -> str:
+    # same arguments, same bytes; string fields are quoted like the CUCM export does it
+    decimal = "," if delimiter == ";" else "."
+    latin_rows = range(int(rows * MIXED_ROWS[0]), int(rows * MIXED_ROWS[1])) if encoding == "mixed" else range(0)
+    start = float(START_EPOCH)
+    with open(path, "wb") as f:
+        for i in range(-(-rows // block_size)):
+            rng = np.random.default_rng([seed, i])
+            first_row = i * block_size
+            block, start = generate_block(rng, first_row, min(block_size, rows - first_row), start, decimal)
+            # split where the encoding changes, a block usually ends up as one piece
+            cuts = sorted({0, len(block), *(min(max(row - first_row, 0), len(block))
+                                            for row in (latin_rows.start, latin_rows.stop))})
+            for lower, upper in zip(cuts, cuts[1:]):
+                text = block.iloc[lower:upper].to_csv(sep=delimiter, index=False, header=first_row + lower == 0,
+                                                      quoting=csv.QUOTE_NONNUMERIC, lineterminator="\r\n")
+                if first_row + lower in latin_rows:
+                    piece_encoding = "cp1252"
+                elif encoding in ("mixed", "utf-8-sig"):
+                    # only the very first bytes carry the byte order mark
+                    piece_encoding = "utf-8-sig" if encoding == "utf-8-sig" and first_row + lower == 0 else "utf-8"
+                else:
+                    piece_encoding = encoding
+                f.write(text.encode(piece_encoding))
+    return path
+
+
+def ensure_file(directory: str, rows: int, seed: int = 1, encoding: str = "utf-8", delimiter: str = ";") -> str:
+    path = os.path.join(directory, default_name(rows, seed, encoding, delimiter))
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        # written under a temporary name, an interrupted run never leaves a truncated file behind
+        generate(path + ".tmp", rows, seed, encoding, delimiter)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    arguments = argparse.ArgumentParser(description="Synthetische CUCM CDR Dateien erzeugen")
+    arguments.add_argument("rows", type=parse_size, help="Zeilen, z.B. 100000 oder 10k, 100k, 1m, 10m")
+    arguments.add_argument("output", help="Zieldatei")
+    arguments.add_argument("--seed", type=int, default=1)
+    arguments.add_argument("--encoding", choices=ENCODINGS, default="utf-8")
+    arguments.add_argument("--delimiter", choices=DELIMITERS, default="semicolon")
+    args = arguments.parse_args(argv)
+    generate(args.output, args.rows, args.seed, args.encoding, DELIMITERS[args.delimiter])
+
+
+if __name__ == '__main__':
+    main()
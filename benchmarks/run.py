@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from generate import DELIMITERS, ENCODINGS, ensure_file, parse_size
+from stage import EXPORT_ROWS, STAGES
+
+DATA_DIR = os.path.join(tempfile.gettempdir(), "cdr_viewer_benchmarks")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+# slower or bigger than the baseline by more than this share counts as a regression
+TOLERANCE = 0.2
+
+
+def measure(stage: str, csv_file: str, export_rows: int, repeat: int, cache_dir: str) -> dict[str, Any]:
+    # every run is a fresh interpreter, best of the runs for the time, the highest peak for the memory
+    env = dict(os.environ, LOCALAPPDATA=cache_dir)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, os.path.join(BENCHMARK_DIR, "stage.py"), stage, csv_file, str(export_rows)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    result = min(runs, key=lambda run: run["seconds"])
+    peaks = [run["peak_rss"] for run in runs if run["peak_rss"] is not None]
+    result["peak_rss"] = max(peaks) if peaks else None
+    result["rows_per_second"] = result["rows"] / result["seconds"] if result["rows"] and result["seconds"] else None
+    return result
+
+
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], tolerance: float) -> list[str]:
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        for metric in ("seconds", "peak_rss"):
+            if result.get(metric) and reference.get(metric) and result[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {reference[metric]:.4g} -> {result[metric]:.4g}")
+    return regressions
+
+
+def print_table(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]) -> None:
+    print(f"{'Stufe':<40} {'Zeit s':>9} {'Zeilen/s':>12} {'Peak MB':>9} {'Basis s':>9}")
+    for key, result in results.items():
+        rate = f"{result['rows_per_second']:,.0f}" if result["rows_per_second"] else "-"
+        peak = f"{result['peak_rss'] / 1024 ** 2:.0f}" if result["peak_rss"] else "-"
+        reference = baseline.get(key, {}).get("seconds")
+        print(f"{key:<40} {result['seconds']:>9.3f} {rate:>12} {peak:>9} "
+              f"{f'{reference:.3f}' if reference else '-':>9}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    arguments = argparse.ArgumentParser(description="Laufzeit, Speicher und Durchsatz der Ladekette messen")
+    arguments.add_argument("--rows", type=parse_size, nargs="+", default=[100_000], help="z.B. 10k 100k 1m 10m")
+    arguments.add_argument("--encoding", choices=ENCODINGS, default="utf-8")
+    arguments.add_argument("--delimiter", choices=DELIMITERS, default="semicolon")
+    arguments.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    arguments.add_argument("--repeat", type=int, default=3)
+    arguments.add_argument("--export-rows", type=int, default=EXPORT_ROWS)
+    arguments.add_argument("--data-dir", default=DATA_DIR, help="generierte Dateien und Cache")
+    arguments.add_argument("--baseline", default=BASELINE_FILE)
+    arguments.add_argument("--save", action="store_true", help="Ergebnis als neue Basis speichern")
+    arguments.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = arguments.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    results = {}
+    for rows in args.rows:
+        csv_file = ensure_file(args.data_dir, rows, encoding=args.encoding, delimiter=DELIMITERS[args.delimiter])
+        cache_dir = os.path.join(args.data_dir, "cache")
+        for stage in args.stages:
+            key = f"{rows}/{args.encoding}/{args.delimiter}/{stage}"
+            results[key] = measure(stage, csv_file, args.export_rows, args.repeat, cache_dir)
+    print_table(results, baseline)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
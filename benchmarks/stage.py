@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+# runs a single benchmark stage in a fresh interpreter and prints one json line; nothing heavy is imported
+# up front so the import stage and the peak memory start from a clean process
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STAGES = ("import", "load", "load_cached", "index", "search", "page", "export")
+QUERIES = [
+    "müller",
+    "Gerät:sep0000",
+    "Anrufer:+4930 UND Dauer>00:05:00",
+    "Gewählte Nummer:1?5* ODER Gerät:csf",
+    "Zeitstempel:02.01.24..05.01.24",
+    "Zeitstempel:09:00..11:00",
+]
+PAGES = 20
+EXPORT_ROWS = 20_000
+# the app modules a headless start pulls in, the GUI adds Kivy on top
+IMPORT_MODULES = ("cli",)
+
+
+def run_stage(stage: str, csv_file: str, export_rows: int) -> dict[str, Any]:
+    # child side: prepare whatever the stage needs untimed, then time only the stage itself
+    if stage == "import":
+        start = time.perf_counter()
+        for name in IMPORT_MODULES:
+            __import__(name)
+        return {"seconds": time.perf_counter() - start, "rows": None}
+
+    from parser import column_name_mapping, load_data
+
+    events = []
+
+    def load(use_cache: bool = True):
+        df, error_message = load_data(csv_file, None, as_dataframe=True, use_cache=use_cache, hooks=[events.append])
+        if error_message:
+            raise RuntimeError(error_message.message)
+        return df
+
+    if stage == "load":
+        start = time.perf_counter()
+        df = load(use_cache=False)
+        # where the load time goes, read/convert/timezone/concat as the parser reports them
+        return {"seconds": time.perf_counter() - start, "rows": len(df), "stages": events[-1].timings}
+    if stage == "load_cached":
+        load()
+        start = time.perf_counter()
+        df = load()
+        return {"seconds": time.perf_counter() - start, "rows": len(df)}
+
+    from query import QueryEngine
+    from search import SearchIndex, TimeIndex
+    from table_model import PagedTable
+
+    df = load()
+    if stage == "index":
+        start = time.perf_counter()
+        SearchIndex(df, list(column_name_mapping.values()))
+        TimeIndex(df["dateTimeOrigination"])
+        return {"seconds": time.perf_counter() - start, "rows": len(df)}
+    if stage == "search":
+        engine = QueryEngine(df, SearchIndex(df, list(column_name_mapping.values())), column_name_mapping,
+                             [TimeIndex(df["dateTimeOrigination"])])
+        start = time.perf_counter()
+        matches = [len(engine.search(query)) for query in QUERIES]
+        return {"seconds": time.perf_counter() - start, "rows": len(df) * len(QUERIES), "matches": matches}
+    if stage == "page":
+        model = PagedTable(df)
+        start = time.perf_counter()
+        for page in [*range(min(PAGES, model.page_count)), model.page_count - 1]:
+            model.set_page(page)
+            model.page_rows()
+        return {"seconds": time.perf_counter() - start, "rows": (min(PAGES, model.page_count) + 1) * model.page_size}
+    if stage == "export":
+        from export import create_pdf
+
+        model = PagedTable(df.iloc[:export_rows])
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            create_pdf([model.column_data, model.iter_rows()], os.path.join(directory, "export.pdf"), total=len(model))
+            return {"seconds": time.perf_counter() - start, "rows": len(model)}
+    raise ValueError(f"unknown stage: {stage}")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    stage, csv_file, export_rows = argv or sys.argv[1:]
+    result = run_stage(stage, csv_file, int(export_rows))
+    from progress import peak_rss
+
+    result["peak_rss"] = peak_rss()
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
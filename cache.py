@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_categorical_dtype, is_object_dtype
+
+# parsed files are kept as one .npy file per column, entries are looked up by source identity
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"), "cdr_viewer")
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+META_FILE = "meta.json"
+
+
+def cache_key(csv_file: str, version: int) -> str:
+    stat = os.stat(csv_file)
+    identity = f"{os.path.abspath(csv_file)}|{stat.st_size}|{stat.st_mtime_ns}|{version}"
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+
+def entry_size(entry: str) -> int:
+    return sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+
+
+def list_entries(cache_dir: str) -> list[tuple[float, str, dict[str, Any]]]:
+    # (last access, path, meta) for every complete entry, oldest first
+    entries: list[tuple[float, str, dict[str, Any]]] = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for name in os.listdir(cache_dir):
+        meta_path = os.path.join(cache_dir, name, META_FILE)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            entries.append((os.path.getmtime(meta_path), os.path.join(cache_dir, name), meta))
+        except (OSError, ValueError):
+            continue
+    return sorted(entries, key=lambda entry: entry[0])
+
+
+def load_cached(csv_file: str, version: int, cache_dir: str = CACHE_DIR) -> Optional[pd.DataFrame]:
+    entry = os.path.join(cache_dir, cache_key(csv_file, version))
+    meta_path = os.path.join(entry, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        columns = {}
+        for column in meta["columns"]:
+            values = np.load(os.path.join(entry, column["file"]), allow_pickle=False)
+            if column["kind"] == "category":
+                categories = np.load(os.path.join(entry, column["categories"]), allow_pickle=False)
+                values = pd.Categorical.from_codes(values, categories=categories.astype(object))
+            elif column["kind"] == "str":
+                values = values.astype(object)
+                if column["nulls"]:
+                    values[np.load(os.path.join(entry, column["nulls"]), allow_pickle=False)] = np.nan
+            columns[column["name"]] = values
+        df = pd.DataFrame(columns, index=np.load(os.path.join(entry, "index.npy"), allow_pickle=False))
+    except (OSError, ValueError, KeyError):
+        # broken entry, parse again and let store_cached replace it
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+    # touching the meta file marks the entry as recently used for the LRU eviction
+    os.utime(meta_path)
+    return df
+
+
+def store_cached(csv_file: str, version: int, df: pd.DataFrame, cache_dir: str = CACHE_DIR,
+                 max_bytes: int = CACHE_MAX_BYTES) -> None:
+    key = cache_key(csv_file, version)
+    entry = os.path.join(cache_dir, key)
+    # write into a temporary directory first so a crash never leaves a half written entry behind
+    staging = os.path.join(cache_dir, f".{key}.{uuid.uuid4().hex}")
+    os.makedirs(staging)
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            column = {"name": name, "file": f"{i}.npy", "kind": "values", "nulls": None}
+            if is_categorical_dtype(series):
+                # codes plus the dictionary, both load without unpickling
+                values = series.cat.codes.to_numpy()
+                column["kind"] = "category"
+                column["categories"] = f"{i}.categories.npy"
+                categories = np.asarray(series.cat.categories.to_numpy(dtype=object), dtype=str)
+                np.save(os.path.join(staging, column["categories"]), categories, allow_pickle=False)
+            elif is_object_dtype(series):
+                nulls = series.isna().to_numpy()
+                values = np.asarray(series.fillna("").to_numpy(), dtype=str)
+                column["kind"] = "str"
+                if nulls.any():
+                    column["nulls"] = f"{i}.nulls.npy"
+                    np.save(os.path.join(staging, column["nulls"]), nulls)
+            else:
+                values = series.to_numpy()
+            np.save(os.path.join(staging, column["file"]), values, allow_pickle=False)
+            columns.append(column)
+        np.save(os.path.join(staging, "index.npy"), df.index.to_numpy(), allow_pickle=False)
+        meta = {"source": os.path.abspath(csv_file), "version": version, "columns": columns}
+        with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    evict(cache_dir, max_bytes, keep=entry)
+
+
+def evict(cache_dir: str, max_bytes: int, keep: Optional[str] = None) -> None:
+    entries = list_entries(cache_dir)
+    kept = next((meta for _, path, meta in entries if path == keep), None)
+    remaining = []
+    for accessed, path, meta in entries:
+        # older parses of a file that has changed since can never be hit again
+        if kept and path != keep and meta.get("source") == kept["source"]:
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            remaining.append((path, entry_size(path)))
+    total = sum(size for _, size in remaining)
+    for path, size in remaining:
+        if total <= max_bytes:
+            break
+        if path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def clear_cache(cache_dir: str = CACHE_DIR) -> None:
+    shutil.rmtree(cache_dir, ignore_errors=True)
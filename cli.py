@@ -0,0 +1,187 @@
+import argparse
+import csv
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator, NamedTuple, Optional, TextIO
+
+import pandas as pd
+
+from parser import column_name_mapping, empty_frame, format_for_display, list_csv_files, load_data, load_files
+from progress import Hook, log_event
+from query import QueryEngine, QueryError, column_specs, compile_query
+from search import SearchIndex, TimeIndex
+from table_model import EXPORT_BATCH_SIZE, PagedTable
+
+OUTPUT_FORMATS = ("pdf", "csv", "jsonl")
+LOG_FORMAT = "%(asctime)s %(processName)s %(message)s"
+
+
+class FileResult(NamedTuple):
+    csv_file: str
+    # matching rows only, the full frame never leaves the worker
+    matches: pd.DataFrame
+    rows: int
+    seconds: float
+    error: Optional[str]
+
+
+def filter_file(csv_file: str, query: str, use_cache: bool = True, workers: Optional[int] = None,
+                verbose: bool = False, merged: Optional[list[str]] = None) -> FileResult:
+    # same semantics as the search bar of the GUI; with merged the files are loaded as one table like in the GUI
+    start = time.perf_counter()
+    if verbose:
+        # worker processes start without the logging setup of the main process
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    hooks: Optional[list[Hook]] = [log_event] if verbose else None
+    try:
+        if merged:
+            df, error_message = load_files(merged, None, as_dataframe=True, use_cache=use_cache, workers=workers,
+                                           hooks=hooks)
+        else:
+            df, error_message = load_data(csv_file, None, as_dataframe=True, use_cache=use_cache, workers=workers,
+                                          hooks=hooks)
+    except Exception as e:
+        # a missing, unreadable or broken file must not stop the rest of the batch
+        return FileResult(csv_file, pd.DataFrame(), 0, time.perf_counter() - start, str(e))
+    if error_message:
+        return FileResult(csv_file, pd.DataFrame(), 0, time.perf_counter() - start, error_message.message)
+    rows = len(df)
+    if query.strip():
+        engine = QueryEngine(df, SearchIndex(df, list(column_name_mapping.values())), column_name_mapping,
+                             [TimeIndex(df["dateTimeOrigination"])])
+        df = df.iloc[engine.search(query)]
+    return FileResult(csv_file, df, rows, time.perf_counter() - start, None)
+
+
+def filter_files(csv_files: list[str], query: str, use_cache: bool = True, processes: Optional[int] = None,
+                 verbose: bool = False, merge: bool = False) -> Iterator[FileResult]:
+    # results in input order; several files are spread over processes, a single file uses the parallel parser instead
+    if merge:
+        yield filter_file(f"{len(csv_files)} Dateien", query, use_cache, processes, verbose, merged=csv_files)
+        return
+    if len(csv_files) == 1 or processes == 1:
+        for csv_file in csv_files:
+            yield filter_file(csv_file, query, use_cache, verbose=verbose)
+        return
+    processes = min(len(csv_files), processes or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        yield from executor.map(filter_file, csv_files, itertools.repeat(query), itertools.repeat(use_cache),
+                                itertools.repeat(1), itertools.repeat(verbose))
+
+
+def output_frame(df: pd.DataFrame, full: bool) -> pd.DataFrame:
+    if full:
+        return format_for_display(df)
+    return format_for_display(df[list(column_name_mapping.values())]).set_axis(list(column_name_mapping), axis=1)
+
+
+def write_text(results: Iterator[FileResult], out: TextIO, output_format: str, full: bool) -> Iterator[FileResult]:
+    header = True
+    for result in results:
+        for start in range(0, len(result.matches), EXPORT_BATCH_SIZE):
+            batch = output_frame(result.matches.iloc[start:start + EXPORT_BATCH_SIZE], full)
+            if output_format == "csv":
+                batch.to_csv(out, header=header, index=False, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+            else:
+                # every record line ends with a newline, batches simply append
+                out.write(batch.to_json(orient="records", lines=True, force_ascii=False))
+            header = False
+        if header and output_format == "csv" and not result.error:
+            # header even without any match, scripts reading the report rely on it
+            output_frame(result.matches.iloc[:0], full).to_csv(out, index=False, lineterminator="\n")
+            header = False
+        yield result
+
+
+def write_pdf(results: Iterator[FileResult], path: str) -> Iterator[FileResult]:
+    from export import create_pdf
+
+    # the pdf pulls its rows batch by batch, the file results are reported once the document is written
+    done = []
+
+    def rows() -> Iterator[Any]:
+        for result in results:
+            yield from PagedTable(result.matches).iter_rows()
+            done.append(result)
+
+    header = PagedTable(pd.DataFrame(columns=list(column_name_mapping.values()))).column_data
+    create_pdf([header, rows()], path)
+    yield from done
+
+
+def report(result: FileResult) -> None:
+    if result.error:
+        print(f"{result.csv_file}: Fehler: {result.error}", file=sys.stderr)
+        return
+    rate = result.rows / result.seconds if result.seconds else 0
+    print(f"{result.csv_file}: {result.rows} Zeilen, {len(result.matches)} Treffer, "
+          f"{result.seconds:.2f} s ({rate:,.0f} Zeilen/s)", file=sys.stderr)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    arguments = argparse.ArgumentParser(description="CDR Dateien laden, filtern und exportieren")
+    arguments.add_argument("files", nargs="+", help="CDR CSV Dateien oder Ordner")
+    arguments.add_argument("-q", "--query", default="", help="Suchanfrage wie in der Suchleiste")
+    arguments.add_argument("-o", "--output", required=True, help="Zieldatei, - für stdout (csv, jsonl)")
+    arguments.add_argument("-f", "--format", choices=OUTPUT_FORMATS, help="Standard: Dateiendung der Zieldatei")
+    arguments.add_argument("--full", action="store_true", help="alle Spalten statt der Tabellenansicht (csv, jsonl)")
+    arguments.add_argument("-j", "--processes", type=int, help="Prozesse für mehrere Dateien")
+    arguments.add_argument("-m", "--merge", action="store_true",
+                           help="alle Dateien zu einer Tabelle zusammenführen, doppelte Anrufe entfernen")
+    arguments.add_argument("--no-cache", action="store_true", help="Dateien immer neu einlesen")
+    arguments.add_argument("-v", "--verbose", action="store_true", help="Fortschritt und Zeiten je Stufe ausgeben")
+    args = arguments.parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+
+    output_format = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if output_format not in OUTPUT_FORMATS:
+        arguments.error(f"unbekanntes Ausgabeformat: {output_format}")
+    if output_format == "pdf" and args.output == "-":
+        arguments.error("PDF kann nicht nach stdout geschrieben werden")
+
+    if args.query.strip():
+        # a typo in the query fails at once instead of after loading the first file
+        try:
+            compile_query(args.query, column_specs(empty_frame(), column_name_mapping))
+        except QueryError as e:
+            print(f"Fehler in der Suchanfrage: {e}", file=sys.stderr)
+            return 2
+
+    start = time.perf_counter()
+    csv_files = list_csv_files(args.files)
+    results = filter_files(csv_files, args.query, not args.no_cache, args.processes, args.verbose, args.merge)
+    rows = matches = failed = 0
+    if output_format == "pdf":
+        written = write_pdf(results, args.output)
+    elif args.output == "-":
+        written = write_text(results, sys.stdout, output_format, args.full)
+    else:
+        out = open(args.output, "w", encoding="utf-8", newline="")
+        written = write_text(results, out, output_format, args.full)
+    try:
+        for result in written:
+            report(result)
+            rows += result.rows
+            matches += len(result.matches)
+            failed += bool(result.error)
+    finally:
+        if output_format != "pdf" and args.output != "-":
+            out.close()
+
+    seconds = time.perf_counter() - start
+    # a merged load fails or succeeds as a whole
+    loaded = len(csv_files) * (not failed) if args.merge else len(csv_files) - failed
+    print(f"Gesamt: {rows} Zeilen aus {loaded} Dateien, {matches} Treffer, {seconds:.2f} s "
+          f"({rows / seconds if seconds else 0:,.0f} Zeilen/s)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,4 @@
+class ShowErrorPopup:
+    def __init__(self, title: str, message: str):
+        self.title = title
+        self.message = message
@@ -1,10 +1,15 @@
 import re
-from typing import Any
+from typing import Any, Callable, Optional
+from xml.sax.saxutils import escape
 
+from reportlab.lib.enums import TA_CENTER
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors as reportlab_colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Table, TableStyle, Paragraph
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 
 colors = {
     "header_text": "#FFFFFF",
@@ -14,6 +19,13 @@ colors = {
     "grid": "#000000"
 }
 
+PAGE_MARGIN = inch
+CELL_PADDING = 3
+HEADER_FONT_SIZE = 13
+BODY_FONT_SIZE = 10
+# a full A4 page holds about this many single line rows, taller rows are carried over to the next page
+ROWS_PER_PAGE = 28
+
 def color(hex_value: str) -> reportlab_colors.Color:
     hex_value = hex_value.lstrip("#")
 
@@ -26,31 +38,8 @@ def color(hex_value: str) -> reportlab_colors.Color:
 def remove_size_tags(text: str) -> str:
     return re.sub(r'\[size=\d+\]|\[/size\]', '', text)
 
-def create_pdf(data: list[Any], path: str) -> None:
-    pdf = SimpleDocTemplate(path, pagesize=A4)
-
-    # Clean header row
-    header_row = data[0]
-    header_row = [remove_size_tags(text) for text, _ in header_row]
-
-    data_rows = data[1:]
-    style = getSampleStyleSheet()['Normal']
-
-    paragraphs = []
-    for row in data_rows:
-        for line in row:
-            p_row = []
-            for text in line:
-                p_row.append(Paragraph(str(text), style))
-            paragraphs.append(p_row)
-
-
-    data = [
-        header_row,
-        *paragraphs
-    ]
-
-    style = TableStyle([
+def table_style() -> TableStyle:
+    return TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), color(colors["header_background"])),
         ('TEXTCOLOR', (0, 0), (-1, 0), color(colors["header_text"])),
         ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
@@ -62,11 +51,95 @@ def create_pdf(data: list[Any], path: str) -> None:
         ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
         ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
         ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('FONTSIZE', (0, 1), (-1, -1), BODY_FONT_SIZE),
         ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
         ('GRID', (0, 0), (-1, -1), 1, color(colors["grid"])),
+        ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+        ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING),
     ])
 
-    table = Table(data)
-    table.setStyle(style)
-    pdf.build([table])
+
+def cell(text: Any, width: float, style: ParagraphStyle) -> Any:
+    # Paragraphs are expensive, only cells that do not fit into their column get one so they can wrap
+    text = str(text)
+    if stringWidth(text, style.fontName, style.fontSize) <= width - 2 * CELL_PADDING:
+        return text
+    return Paragraph(escape(text), style)
+
+
+def column_widths(header_row: list[str], rows: list[Any], frame_width: float) -> list[float]:
+    # measured once on the first page so every page shares the same layout and fills the frame,
+    # headers may wrap between words and the few outliers above the 90th percentile wrap as well
+    widths = []
+    for i, text in enumerate(header_row):
+        cells = sorted(stringWidth(str(line[i]), "Helvetica", BODY_FONT_SIZE) for line in rows) or [0.0]
+        header = max(stringWidth(word, "Helvetica-Bold", HEADER_FONT_SIZE) for word in text.split())
+        widths.append(max(header, cells[int(len(cells) * 0.9)]) + 2 * CELL_PADDING)
+    scale = frame_width / sum(widths)
+    return [width * scale for width in widths]
+
+
+def create_pdf(data: list[Any], path: str, callback: Optional[Callable[[str], None]] = None,
+               total: Optional[int] = None) -> None:
+    # draws page sized tables straight onto the canvas, rows may come from a generator and are never all in memory
+    page_width, page_height = A4
+    frame_width = page_width - 2 * PAGE_MARGIN
+    frame_height = page_height - 2 * PAGE_MARGIN
+
+    # Clean header row
+    header_row = [remove_size_tags(text) for text, _ in data[0]]
+
+    sample_style = getSampleStyleSheet()['Normal']
+    header_style = ParagraphStyle(
+        "header", parent=sample_style, fontName="Helvetica-Bold", fontSize=HEADER_FONT_SIZE,
+        leading=HEADER_FONT_SIZE * 1.2, alignment=TA_CENTER, textColor=color(colors["header_text"])
+    )
+    body_style = ParagraphStyle(
+        "cell", parent=sample_style, fontName="Helvetica", fontSize=BODY_FONT_SIZE, leading=BODY_FONT_SIZE * 1.2,
+        alignment=TA_CENTER
+    )
+    style = table_style()
+    canvas = Canvas(path, pagesize=A4)
+    col_widths: list[float] = []
+    header: list[Any] = []
+    exported = 0
+
+    def draw_page(rows: list[Any]) -> list[Any]:
+        # draws as many rows as fit on one page and returns the rest
+        nonlocal col_widths, header
+        if not col_widths:
+            col_widths = column_widths(header_row, rows, frame_width)
+            header = [cell(text, width, header_style) for text, width in zip(header_row, col_widths)]
+        cells = [[cell(text, width, body_style) for text, width in zip(line, col_widths)] for line in rows]
+        table = Table([header, *cells], colWidths=col_widths, repeatRows=1)
+        table.setStyle(style)
+        _, height = table.wrapOn(canvas, frame_width, frame_height)
+        if height > frame_height:
+            table = table.split(frame_width, frame_height)[0]
+            _, height = table.wrapOn(canvas, frame_width, frame_height)
+        drawn = max(len(table._cellvalues) - 1, 1)
+        table.drawOn(canvas, PAGE_MARGIN, page_height - PAGE_MARGIN - height)
+        canvas.showPage()
+        return rows[drawn:]
+
+    def flush(rows: list[Any]) -> list[Any]:
+        nonlocal exported
+        rest = draw_page(rows)
+        exported += len(rows) - len(rest)
+        if callback:
+            callback(f"{exported}/{total} Zeilen exportiert..." if total else f"{exported} Zeilen exportiert...")
+        return rest
+
+    pending: list[Any] = []
+    data_rows = data[1:]
+    for row in data_rows:
+        for line in row:
+            pending.append(line)
+            if len(pending) >= ROWS_PER_PAGE:
+                pending = flush(pending)
+    while pending:
+        pending = flush(pending)
+    if exported == 0:
+        # an empty result still gets a page with the header
+        draw_page([])
+    canvas.save()
@@ -0,0 +1,177 @@
+import os
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+from parser import (CHUNK_SIZE_SAMPLE, MIN_CHUNK_SIZE, body_encoding, concat_frames, parse_bytes, read_header,
+                    row_width, rows_per_budget, sniff_file)
+from progress import LoadProgress
+
+# seconds between two looks at the followed file
+FOLLOW_INTERVAL = 2.0
+# a file that grew a lot is caught up over several polls, the table updates in between
+FOLLOW_READ_SIZE = 64 * 1024 ** 2
+# bytes in front of the offset that have to stay the same, otherwise the file was written anew
+FINGERPRINT_SIZE = 256
+COUNT_BLOCK_SIZE = 16 * 1024 ** 2
+
+
+class FollowState(NamedTuple):
+    csv_file: str
+    encoding: str
+    delimiter: str
+    names: tuple[str, ...]
+    # behind the last complete line that has been parsed
+    offset: int
+    # data lines before offset, the rows of the frame are numbered by their line like on a full load
+    lines: int
+    fingerprint: bytes
+    # (device, inode), a different file under the same name means the old one was rotated away
+    identity: tuple[int, int]
+
+
+class FollowUpdate(NamedTuple):
+    state: FollowState
+    frame: pd.DataFrame
+    # frame holds the file from its start, the rows seen so far are gone (truncated or a different header)
+    replace: bool
+
+
+def file_identity(stat: os.stat_result) -> tuple[int, int]:
+    return stat.st_dev, stat.st_ino
+
+
+def read_fingerprint(csv_file: str, offset: int) -> bytes:
+    with open(csv_file, "rb") as f:
+        f.seek(max(offset - FINGERPRINT_SIZE, 0))
+        return f.read(min(offset, FINGERPRINT_SIZE))
+
+
+def open_state(csv_file: str) -> FollowState:
+    # dialect and encoding are sniffed once, the appended lines are parsed with them
+    stat = os.stat(csv_file)
+    encoding, dialect = sniff_file(csv_file)
+    with open(csv_file, "rb") as f:
+        f.readline()
+        offset = f.tell()
+    names = tuple(read_header(csv_file, dialect.delimiter, encoding))
+    return FollowState(csv_file, encoding, dialect.delimiter, names, offset, 0,
+                       read_fingerprint(csv_file, offset), file_identity(stat))
+
+
+def skip_lines(csv_file: str, offset: int, lines: int) -> tuple[int, int]:
+    # offset behind the given number of complete lines and how many of them there were
+    line_start, found = offset, 0
+    with open(csv_file, "rb") as f:
+        f.seek(offset)
+        while found < lines:
+            block = f.read(COUNT_BLOCK_SIZE)
+            if not block:
+                break
+            count = block.count(b"\n")
+            if found + count < lines:
+                found += count
+                if count:
+                    line_start = offset + block.rfind(b"\n") + 1
+                offset += len(block)
+                continue
+            position = -1
+            for _ in range(lines - found):
+                position = block.index(b"\n", position + 1)
+            return offset + position + 1, lines
+    return line_start, found
+
+
+def attach(csv_file: str, df: pd.DataFrame) -> tuple[FollowState, pd.DataFrame]:
+    # follow a file that was loaded with load_data; a last line that was still being written during the load
+    # is dropped from df and read again once it is complete
+    state = open_state(csv_file)
+    lines = int(df.index[-1]) + 1 if len(df) else 0
+    offset, complete = skip_lines(csv_file, state.offset, lines)
+    if complete < lines:
+        df = df[df.index < complete]
+    return state._replace(offset=offset, lines=complete, fingerprint=read_fingerprint(csv_file, offset)), df
+
+
+def read_lines(state: FollowState, size: int, final: bool = False) -> tuple[FollowState, pd.DataFrame]:
+    # parses the complete lines between the offset and size through the usual transform;
+    # final for a file that is no longer written, its last line counts even without a line break
+    end = min(size, state.offset + FOLLOW_READ_SIZE)
+    with open(state.csv_file, "rb") as f:
+        f.seek(state.offset)
+        data = f.read(end - state.offset)
+    complete = len(data) if final and end == size else data.rfind(b"\n") + 1
+    if not complete:
+        return state, pd.DataFrame()
+    data = data[:complete]
+    chunk_size = max(MIN_CHUNK_SIZE, rows_per_budget(row_width(data[:CHUNK_SIZE_SAMPLE])))
+    frame, rows = parse_bytes(data, list(state.names), state.delimiter, body_encoding(state.encoding), chunk_size,
+                              LoadProgress())
+    frame.index += state.lines
+    offset = state.offset + complete
+    # the bytes in front of the new offset, new data can be shorter than the fingerprint
+    fingerprint = (state.fingerprint + data)[-FINGERPRINT_SIZE:]
+    return state._replace(offset=offset, lines=state.lines + rows, fingerprint=fingerprint), frame
+
+
+def find_rotated(state: FollowState) -> Optional[str]:
+    # the followed file under its new name, rotation renames it within the same directory
+    directory = os.path.dirname(os.path.abspath(state.csv_file))
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and file_identity(os.stat(entry.path)) == state.identity:
+                return entry.path
+        except OSError:
+            continue
+    return None
+
+
+def drain(state: FollowState) -> tuple[FollowState, list[pd.DataFrame]]:
+    # rows written to the rotated file after the last poll; gone if it was deleted instead of renamed
+    rotated = find_rotated(state)
+    if rotated is None:
+        return state, []
+    current = state._replace(csv_file=rotated)
+    size = os.path.getsize(rotated)
+    frames = []
+    while current.offset < size:
+        current, frame = read_lines(current, size, final=True)
+        frames.append(frame)
+    return current._replace(csv_file=state.csv_file), [frame for frame in frames if not frame.empty]
+
+
+def poll(state: FollowState) -> Optional[FollowUpdate]:
+    # None while nothing changed or the file is briefly missing during a rotation
+    try:
+        stat = os.stat(state.csv_file)
+    except FileNotFoundError:
+        return None
+    if file_identity(stat) != state.identity:
+        # rotated, the new file starts with its own header and continues the table behind the rest of the old one
+        fresh = open_state(state.csv_file)
+        if fresh.names != state.names:
+            fresh, frame = read_lines(fresh, stat.st_size)
+            return FollowUpdate(fresh, frame, True)
+        drained, frames = drain(state)
+        fresh, frame = read_lines(fresh._replace(lines=drained.lines), stat.st_size)
+        frames = [*frames, frame] if not frame.empty else frames
+        if not frames:
+            return FollowUpdate(fresh, pd.DataFrame(), False)
+        return FollowUpdate(fresh, frames[0] if len(frames) == 1 else concat_frames(frames), False)
+    if stat.st_size < state.offset or read_fingerprint(state.csv_file, state.offset) != state.fingerprint:
+        # truncated or written anew in place
+        fresh, frame = read_lines(open_state(state.csv_file), stat.st_size)
+        return FollowUpdate(fresh, frame, True)
+    if stat.st_size == state.offset:
+        return None
+    fresh, frame = read_lines(state, stat.st_size)
+    return FollowUpdate(fresh, frame, False) if fresh != state else None
+
+
+def append_rows(df: pd.DataFrame, frame: pd.DataFrame) -> pd.DataFrame:
+    # categorical dictionaries are merged, the new rows keep their line numbers as index
+    if frame.empty:
+        return df
+    if df.empty:
+        return frame
+    return concat_frames([df, frame[list(df.columns)]])
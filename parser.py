@@ -1,190 +1,759 @@
-from datetime import timedelta
+import codecs
+import csv
+import io
+import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from csv import Sniffer
-from typing import Any, Tuple, List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Literal, Tuple, TypeVar, List, Optional, BinaryIO, Union, overload
 
+import numpy as np
 import pandas as pd
-from chardet import UniversalDetector
-from kivy.metrics import dp
 from numpy import recarray
+from numpy.typing import NDArray
 from pandas import DataFrame
+from pandas.api.types import (is_categorical_dtype, is_datetime64_any_dtype, is_numeric_dtype,
+                              is_timedelta64_dtype, union_categoricals)
 import pytz
-from pandas._libs.tslibs.timestamps import Timestamp
+
+from cache import load_cached, store_cached
+from errors import ShowErrorPopup
+from progress import Hook, LoadProgress, ProgressEvent
 
 warnings.filterwarnings("ignore")
 
 LOCAL_TIMEZONE = pytz.timezone('Europe/Berlin')
 
+# bump whenever the loaded frame changes, cached parses of older versions are ignored
+PARSER_VERSION = 6
+
+DATE_FORMAT = "%d.%m.%y"
+TIME_FORMAT = "%H:%M:%S"
+TIMESTAMP_FORMAT = f"{DATE_FORMAT} {TIME_FORMAT}"
+DISPLAY_FORMATS = {
+    "dateTimeOrigination": TIMESTAMP_FORMAT,
+    "dateTimeConnect"    : TIME_FORMAT,
+    "dateTimeDisconnect" : TIMESTAMP_FORMAT,
+}
+SECONDS_PER_DAY = 86_400
+NANOSECONDS = 1_000_000_000
+
+# Define a mapping between the visible column names and their corresponding DataFrame column names
+column_name_mapping = {
+    "Zeitstempel"    : "dateTimeOrigination",
+    "Anrufer"        : "callingPartyNumber",
+    "Gewählte Nummer": "originalCalledPartyNumber",
+    "Verbunden um"   : "dateTimeConnect",
+    "Dauer"          : "duration",
+    "Gerät"          : "origDeviceName"
+}
+
+# rows per chunk are derived from the file; raw CSV bytes grow roughly by this factor once parsed
+CHUNK_MEMORY_BUDGET = 64 * 1024 ** 2
+CHUNK_MEMORY_FACTOR = 4
+CHUNK_SIZE_SAMPLE = 64 * 1024
+MIN_CHUNK_SIZE = 1_000
 
-class ShowErrorPopup:
-    def __init__(self, title: str, message: str):
-        self.title = title
-        self.message = message
+# files above this size are split into line aligned byte ranges and parsed in a process pool
+PARALLEL_MIN_FILE_SIZE = 64 * 1024 ** 2
+PARALLEL_RANGE_SIZE = 32 * 1024 ** 2
 
+# encoding detection and dialect sniffing only ever look at bounded byte samples,
+# decoding then streams and reads the odd late bad byte as cp1252 (see decode_as_cp1252)
+ENCODING_SAMPLE_SIZE = 256 * 1024
+DIALECT_SAMPLE_SIZE = 2048
+DECODE_ERRORS = "cdr_cp1252"
 
-def convert_empty_category(val: str) -> str | Any:
-    if len(val) < 2 or "\\" in val or val is None:
-        return ""
-    elif "E+" in val:
+# read with native dtypes so pandas stays on the C parser, cleanup happens vectorized in transform_chunk;
+# the string columns repeat heavily and end up as categoricals (codes plus one shared dictionary)
+REQUIRED_COLUMNS = {
+    "dateTimeOrigination"               : "UInt32",
+    "callingPartyNumber"                : "str",
+    "callingPartyUnicodeLoginUserID"    : "str",
+    "originalCalledPartyNumber"         : "str",
+    "finalCalledPartyUnicodeLoginUserID": "str",
+    "dateTimeConnect"                   : "UInt32",
+    "dateTimeDisconnect"                : "UInt32",
+    "origDeviceName"                    : "str",
+}
+STRING_COLUMNS = [column for column, dtype in REQUIRED_COLUMNS.items() if dtype == "str"]
+TIME_COLUMNS = [column for column, dtype in REQUIRED_COLUMNS.items() if dtype == "UInt32"]
+# call identity, read whenever the export has these columns; CUCM writes one record per call leg and the legs of a
+# transfer or conference share the global call id, so only records that also match on the leg are duplicates
+CALL_ID_COLUMNS = ["globalCallID_callManagerId", "globalCallID_callId", "origLegCallIdentifier"]
+CALL_ID_DTYPE = "UInt32"
+
+# load_data and load_files return the frame with the error of a failed load, or the rows for the table widget
+FrameResult = Tuple[DataFrame, Optional[ShowErrorPopup]]
+TableResult = Tuple[List[Tuple[str, float]], recarray[Any, Any]]
+LoadResult = Union[FrameResult, TableResult]
+
+
+def convert_empty_category(column: pd.Series) -> pd.Series:
+    # numbers and devices repeat a lot, so clean each distinct value once and broadcast via the codes
+    codes, uniques = pd.factorize(column)
+    values = pd.Series(uniques, dtype=object)
+    # placeholders like "\\" or single characters are shown as empty
+    empty = (values.str.len() < 2) | values.str.contains("\\", regex=False)
+    scientific = values.str.contains("E+", regex=False) & ~empty
+    if scientific.any():
         # Replace comma with period and convert to float
-        if "," in val:
-            val = float(val.replace(",", "."))
-        return "+" + str(int(val))
-    else:
-        return val
+        numbers = values[scientific].str.replace(",", ".", regex=False).astype(float).astype("int64")
+        values[scientific] = "+" + numbers.astype(str)
+    values[empty] = ""
+    # several raw values can clean up to the same text, categories have to stay unique;
+    # missing values have code -1 and pick up the trailing ""
+    clean_codes, categories = pd.factorize(pd.concat([values, pd.Series([""])], ignore_index=True))
+    codes = clean_codes[codes]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=column.index)
 
 
-def convert_empty_time(val: str) -> str | Any:
-    if pd.isna(val):
-        return ""
-    try:
+def convert_empty_time(column: pd.Series) -> pd.Series:
+    if is_datetime64_any_dtype(column):
+        return column
+    if is_numeric_dtype(column):
         # If it's a Unix timestamp, convert to datetime
-        timestamp = pd.to_datetime(val, unit="s")
-    except ValueError:
-        # If it's a datetime string, parse it directly
-        timestamp = pd.to_datetime(val)
-    return timestamp
+        return pd.to_datetime(column, unit="s")
+    # If it's a datetime string, parse it directly; plain numbers like the 0 of unanswered calls stay unix seconds
+    seconds = pd.to_numeric(column, errors="coerce")
+    parsed = pd.to_datetime(column.where(seconds.isna()), errors="coerce")
+    return parsed.where(seconds.isna(), pd.to_datetime(seconds, unit="s"))
+
+
+def format_column(name: str, column: pd.Series) -> pd.Series:
+    # typed columns are only turned into text for the rows that are actually shown or exported
+    if is_timedelta64_dtype(column):
+        return format_duration(column)
+    if is_datetime64_any_dtype(column):
+        return format_timestamps(column, DISPLAY_FORMATS.get(name, TIMESTAMP_FORMAT))
+    return column
+
+
+@lru_cache(maxsize=1)
+def times_of_day() -> NDArray[np.object_]:
+    seconds = np.arange(SECONDS_PER_DAY)
+    texts: NDArray[np.object_] = (pd.Series(seconds // 3600).astype(str).str.zfill(2) + ":"
+            + pd.Series(seconds % 3600 // 60).astype(str).str.zfill(2) + ":"
+            + pd.Series(seconds % 60).astype(str).str.zfill(2)).to_numpy()
+    return texts
+
+
+def format_timestamps(column: pd.Series, fmt: str) -> pd.Series:
+    # strftime costs microseconds per value; whole-second timestamps in the display formats are put together
+    # from one text per distinct day and a table of all times of day instead
+    values = column.to_numpy(dtype="datetime64[ns]").view("int64")
+    missing = np.isnat(column.to_numpy(dtype="datetime64[ns]"))
+    if fmt not in (TIMESTAMP_FORMAT, TIME_FORMAT) or (values[~missing] % NANOSECONDS).any():
+        return column.dt.strftime(fmt).fillna("")
+    seconds = np.where(missing, 0, values // NANOSECONDS)
+    text = pd.Series(times_of_day()[seconds % SECONDS_PER_DAY], index=column.index, dtype=object)
+    if fmt == TIMESTAMP_FORMAT:
+        day_codes, days = pd.factorize(seconds // SECONDS_PER_DAY)
+        day_text = pd.to_datetime(days * SECONDS_PER_DAY, unit="s").strftime(DATE_FORMAT + " ").to_numpy()
+        text = pd.Series(day_text[day_codes], index=column.index, dtype=object) + text
+    text[missing] = ""
+    return text
 
 
-def convert_to_table(dataframe: pd.DataFrame, full: bool = False) -> tuple[list[tuple[str, float]], recarray]:
+def format_for_display(dataframe: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(
+        {name: format_column(name, dataframe[name]) for name in dataframe.columns}, index=dataframe.index
+    )
+
+
+def convert_to_table(dataframe: pd.DataFrame, full: bool = False) -> TableResult:
     # standard: callingPartyNumber, originalCalledPartyNumber, dateTimeConnect, origDeviceName, duration
     if full:
-        return list(dataframe.columns), dataframe.to_records(index=False)
+        return list(dataframe.columns), format_for_display(dataframe).to_records(index=False)
     else:
-        df = dataframe[["dateTimeOrigination",
-                        "callingPartyNumber",
-                        "originalCalledPartyNumber",
-                        "dateTimeConnect",
-                        "duration",
-                        "origDeviceName"]]
+        df = format_for_display(dataframe[["dateTimeOrigination",
+                                           "callingPartyNumber",
+                                           "originalCalledPartyNumber",
+                                           "dateTimeConnect",
+                                           "duration",
+                                           "origDeviceName"]])
         col_text_size = 20
-        colnames = [
-            (f"[size={col_text_size}]Zeitstempel[/size]", dp(35)),
-            (f"[size={col_text_size}]Anrufer[/size]", dp(35)),
-            (f"[size={col_text_size}]Gewählte Nummer[/size]", dp(39)),
-            (f"[size={col_text_size}]Verbunden um[/size]", dp(32)),
-            (f"[size={col_text_size}]Dauer[/size]", dp(25)),
-            (f"[size={col_text_size}]Gerät[/size]", dp(49))
+        # widths in dp, the GUI scales them to the screen density
+        colnames: list[tuple[str, float]] = [
+            (f"[size={col_text_size}]Zeitstempel[/size]", 35),
+            (f"[size={col_text_size}]Anrufer[/size]", 35),
+            (f"[size={col_text_size}]Gewählte Nummer[/size]", 39),
+            (f"[size={col_text_size}]Verbunden um[/size]", 32),
+            (f"[size={col_text_size}]Dauer[/size]", 25),
+            (f"[size={col_text_size}]Gerät[/size]", 49)
         ]
         return colnames, df.to_records(index=False)
 
 
-from datetime import timedelta
+def check_date_time_connect(connect: pd.Series) -> NDArray[np.bool_]:
+    # missing connect time or unix time 0 (1970) -> call was never connected
+    return np.asarray(connect.isna() | (connect.dt.year == 1970), dtype=bool)
 
 
-def check_date_time_connect(val: str) -> bool:
-    if pd.isna(val):
-        return True
-    # check if val is a string formatted timestamp with unix time 0
-    if isinstance(val, Timestamp) and val.year == 1970:
-        return True
+def format_duration(duration: pd.Series) -> pd.Series:
+    # hours keep counting past a day, negative durations come from missing disconnect times and stay empty
+    seconds = duration.dt.total_seconds()
+    valid = seconds >= 0
+    total = seconds[valid].astype("int64")
+    formatted = pd.Series("", index=duration.index, dtype=object)
+    formatted[valid] = (
+        (total // 3600).astype(str).str.zfill(2) + ":"
+        + (total % 3600 // 60).astype(str).str.zfill(2) + ":"
+        + (total % 60).astype(str).str.zfill(2)
+    )
+    return formatted
 
 
-def process_chunks(reader: Any, callback: Any, chunk_size: int) -> pd.DataFrame:
-    df = pd.DataFrame()
-    for i, chunk in enumerate(reader):
+def to_local_time(*columns: pd.Series) -> list[pd.Series]:
+    # convert all columns in a single UTC -> LOCAL_TIMEZONE localization, DST rules come from the tz database
+    values = np.concatenate([column.to_numpy(dtype="datetime64[ns]") for column in columns])
+    local = pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(LOCAL_TIMEZONE).tz_localize(None).to_numpy()
+    converted = []
+    offset = 0
+    for column in columns:
+        converted.append(pd.Series(local[offset:offset + len(column)], index=column.index))
+        offset += len(column)
+    return converted
+
+
+def transform_chunk(chunk: pd.DataFrame, progress: Optional[LoadProgress] = None) -> pd.DataFrame:
+    progress = progress or LoadProgress()
+    with progress.stage("convert"):
         chunk = chunk.dropna(subset=["dateTimeOrigination"])
-        chunk["dateTimeConnect"] = chunk.apply(
-            lambda x: x["dateTimeDisconnect"] if check_date_time_connect(x["dateTimeConnect"]) else x["dateTimeConnect"], axis=1)
-        chunk["duration"] = chunk["dateTimeDisconnect"] - chunk["dateTimeOrigination"]
-        chunk["duration"] = chunk["duration"].apply(
-            lambda x: "" if pd.isna(x) else f"{x.seconds // 3600:02d}:{x.seconds % 3600 // 60:02d}:{x.seconds % 60:02d}"
+        for column in STRING_COLUMNS:
+            chunk[column] = convert_empty_category(chunk[column])
+        origination = convert_empty_time(chunk["dateTimeOrigination"])
+        disconnect = convert_empty_time(chunk["dateTimeDisconnect"])
+        connect = convert_empty_time(chunk["dateTimeConnect"])
+        unanswered = check_date_time_connect(connect)
+        # the connect time of an unanswered call is replaced below, the flag keeps it apart for the statistics
+        chunk["connected"] = ~unanswered
+        connect = pd.Series(np.where(unanswered, disconnect.to_numpy(), connect.to_numpy()), index=chunk.index)
+        chunk["duration"] = disconnect - origination
+        for column in CALL_ID_COLUMNS:
+            if column in chunk.columns:
+                # 0 marks a missing id, such records are never treated as duplicates
+                chunk[column] = chunk[column].fillna(0).to_numpy(dtype=np.uint32)
+
+    # columns stay datetime64/timedelta64, format_for_display turns them into text when shown
+    with progress.stage("timezone"):
+        chunk["dateTimeOrigination"], chunk["dateTimeConnect"], chunk["dateTimeDisconnect"] = to_local_time(
+            origination, connect, disconnect
         )
+    return chunk
+
+
+def empty_frame() -> pd.DataFrame:
+    # the columns and dtypes of a loaded file without any rows
+    raw = {column: pd.Series(dtype=object if dtype == "str" else dtype) for column, dtype in REQUIRED_COLUMNS.items()}
+    return transform_chunk(pd.DataFrame(raw))
 
-        # Convert Unix timestamps to datetime objects
-        chunk["dateTimeOrigination"] = chunk["dateTimeOrigination"].apply(lambda x: pd.to_datetime(x, unit='s'))
-        chunk["dateTimeConnect"] = chunk["dateTimeConnect"].apply(lambda x: pd.to_datetime(x, unit='s'))
-        chunk["dateTimeDisconnect"] = chunk["dateTimeDisconnect"].apply(lambda x: pd.to_datetime(x, unit='s'))
-
-        # Manually add time difference for Berlin time (1 hour during standard time, 2 hours during daylight saving time)
-        def adjust_to_berlin_time(dt):
-            if dt.year <= 2021:
-                dst_start = pd.to_datetime(f"{dt.year}-03-28 01:00:00")
-                dst_end = pd.to_datetime(f"{dt.year}-10-31 01:00:00")
-            else:
-                dst_start = pd.to_datetime(f"{dt.year}-03-27 01:00:00")
-                dst_end = pd.to_datetime(f"{dt.year}-10-30 01:00:00")
-
-            if dst_start <= dt < dst_end:
-                return dt + timedelta(hours=2)  # Add 2 hours for daylight saving time
-            else:
-                return dt + timedelta(hours=1)  # Add 1 hour for standard time
-
-        chunk["dateTimeOrigination"] = chunk["dateTimeOrigination"].apply(adjust_to_berlin_time)
-        chunk["dateTimeConnect"] = chunk["dateTimeConnect"].apply(adjust_to_berlin_time)
-        chunk["dateTimeDisconnect"] = chunk["dateTimeDisconnect"].apply(adjust_to_berlin_time)
-
-        # Convert datetime objects to strings
-        chunk["dateTimeOrigination"] = chunk["dateTimeOrigination"].apply(lambda x: x.strftime("%d.%m.%y %H:%M:%S"))
-        chunk["dateTimeConnect"] = chunk["dateTimeConnect"].apply(lambda x: x.strftime("%H:%M:%S"))
-        chunk["dateTimeDisconnect"] = chunk["dateTimeDisconnect"].apply(lambda x: x.strftime("%d.%m.%y %H:%M:%S"))
-
-        df = df.append(chunk)
-        callback(f"{(i + 1) * chunk_size} Chunks geladen...")
+
+def concat_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    # categorical columns only stay categorical if the chunk dictionaries are merged explicitly
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, copy=False)
+    for column in frames[0].columns:
+        if is_categorical_dtype(frames[0][column]):
+            df[column] = pd.Series(union_categoricals([frame[column] for frame in frames]), index=df.index)
     return df
 
 
+def choose_chunk_size(csv_file: str, memory_budget: int = CHUNK_MEMORY_BUDGET) -> int:
+    # estimate the row width from the head of the file, then aim for ~100 chunks per file
+    # without letting a single chunk grow past the memory budget
+    file_size = os.path.getsize(csv_file)
+    with open(csv_file, "rb") as f:
+        sample = f.read(CHUNK_SIZE_SAMPLE)
+    bytes_per_row = row_width(sample)
+    rows_per_file = int(file_size / bytes_per_row)
+    return max(MIN_CHUNK_SIZE, min(rows_per_file // 100, rows_per_budget(bytes_per_row, memory_budget)))
 
-def load_data(csv_file: str, callback: Any, as_dataframe: bool = False, full: bool = False) -> Tuple[Optional[DataFrame], Optional[str]]:
-    req_cols = {
-        "dateTimeOrigination"               : "uint32",
-        "callingPartyNumber"                : "str",
-        "callingPartyUnicodeLoginUserID"    : "str",
-        "originalCalledPartyNumber"         : "str",
-        "finalCalledPartyUnicodeLoginUserID": "str",
-        "dateTimeConnect"                   : "uint32",
-        "dateTimeDisconnect"                : "uint32",
-        "origDeviceName"                    : "str",
-    }
-    converters = {
-        "callingPartyUnicodeLoginUserID"    : convert_empty_category,
-        "finalCalledPartyUnicodeLoginUserID": convert_empty_category,
-        "origDeviceName"                    : convert_empty_category,
-        "callingPartyNumber"                : convert_empty_category,
-        "originalCalledPartyNumber"         : convert_empty_category,
-        "dateTimeOrigination"               : convert_empty_time,
-        "dateTimeConnect"                   : convert_empty_time,
-        "dateTimeDisconnect"                : convert_empty_time,
-    }
-
-    with open(csv_file, "r") as f:
-        dialect = Sniffer().sniff(f.read(2048))
-    df = pd.DataFrame()
-    chunk_size = 16
-    error_message = None
+
+def row_width(sample: bytes) -> float:
+    return max(len(sample) / max(sample.count(b"\n"), 1), 1.0)
+
+
+def rows_per_budget(bytes_per_row: float, memory_budget: int = CHUNK_MEMORY_BUDGET) -> int:
+    return int(memory_budget / (bytes_per_row * CHUNK_MEMORY_FACTOR))
+
+
+def process_chunks(reader: Any, progress: LoadProgress, source: Optional[BinaryIO] = None) -> pd.DataFrame:
+    # collect and concatenate once, appending to a frame copies everything on every chunk;
+    # the position of the source file tells how many bytes the C parser has consumed so far
+    chunks = []
+    chunk_iter = iter(reader)
+    while True:
+        with progress.stage("read"):
+            chunk = next(chunk_iter, None)
+        if chunk is None:
+            break
+        chunks.append(transform_chunk(chunk, progress))
+        progress.advance(source.tell() if source else None, len(chunks[-1]))
+    with progress.stage("concat"):
+        return concat_frames(chunks)
+
+
+def decode_as_cp1252(error: UnicodeError) -> Tuple[str, int]:
+    # codecs error handler: bytes that do not fit the detected encoding almost always come from a single byte
+    # export appended to a utf-8 file ("m\xfcller"), cp1252 reads them right; bytes cp1252 leaves undefined
+    # map to the same code point like latin-1 does
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    data = error.object[error.start:error.end]
     try:
-        df = process_chunks(
-            reader=pd.read_csv(  # type: ignore
-                csv_file, chunksize=chunk_size, usecols=[*req_cols], dtype=req_cols, converters=converters,
-                delimiter=dialect.delimiter
-            ), callback=callback, chunk_size=chunk_size
-        )
+        return data.decode("cp1252"), error.end
+    except UnicodeDecodeError:
+        return data.decode("latin-1"), error.end
+
+
+codecs.register_error(DECODE_ERRORS, decode_as_cp1252)
+
+
+def sniff_file(csv_file: str) -> Tuple[str, Any]:
+    # one bounded sample from the start, middle and end of the file decides encoding and dialect up front
+    file_size = os.path.getsize(csv_file)
+    with open(csv_file, "rb") as f:
+        head = f.read(ENCODING_SAMPLE_SIZE)
+        samples = [head]
+        if file_size > 3 * ENCODING_SAMPLE_SIZE:
+            for offset in (file_size // 2, file_size - ENCODING_SAMPLE_SIZE):
+                f.seek(offset)
+                samples.append(f.read(ENCODING_SAMPLE_SIZE))
+    if all(is_utf8(sample) for sample in samples):
+        # the common case, strict utf-8 decoding is a far stronger signal than the statistics of chardet
+        # and costs next to nothing compared to it
+        encoding = "UTF-8-SIG" if head.startswith(codecs.BOM_UTF8) else "utf-8"
+        return encoding, Sniffer().sniff(head[:DIALECT_SAMPLE_SIZE].decode(encoding, errors=DECODE_ERRORS))
+    # only needed for files that are not in the cache yet
+    from chardet import UniversalDetector
+
+    detector = UniversalDetector()
+    for sample in samples:
+        detector.feed(sample)
+        if detector.done:
+            break
+    detector.close()
+    encoding = detector.result["encoding"] or "utf-8"
+    if encoding.lower() == "ascii":
+        # a plain ascii sample says nothing about the rest, utf-8 decodes it the same way
+        encoding = "utf-8"
+    dialect = Sniffer().sniff(head[:DIALECT_SAMPLE_SIZE].decode(encoding, errors=DECODE_ERRORS))
+    return encoding, dialect
+
+
+def is_utf8(sample: bytes) -> bool:
+    # samples start and end anywhere, a character cut off at either end is not an error
+    start = 0
+    while start < min(len(sample), 3) and 0x80 <= sample[start] < 0xC0:
+        start += 1
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample[start:], final=False)
     except UnicodeDecodeError:
-        callback("Scanne Encoding...")
-        detector = UniversalDetector()
+        return False
+    return True
+
+
+def body_encoding(encoding: str) -> str:
+    # the byte order mark only ever precedes the header, rows read on their own are plain utf-8
+    return "utf-8" if encoding.upper() == "UTF-8-SIG" else encoding
+
+
+def read_header(csv_file: str, delimiter: str, encoding: str) -> list[str]:
+    with open(csv_file, "r", encoding=encoding, errors=DECODE_ERRORS, newline="") as f:
+        return next(csv.reader(f, delimiter=delimiter), [])
+
+
+def read_columns(names: list[str], time_text: bool = False) -> dict[str, str]:
+    # the required columns plus whichever call id columns the export has
+    columns = {**REQUIRED_COLUMNS, **{column: CALL_ID_DTYPE for column in CALL_ID_COLUMNS if column in names}}
+    if time_text:
+        columns.update(dict.fromkeys(TIME_COLUMNS, "str"))
+    return columns
+
+
+Result = TypeVar("Result")
+
+
+def read_with_time_text(read: Callable[[dict[str, str]], Result], names: list[str], progress: LoadProgress) -> Result:
+    # exports with timestamps like "2024-01-02 10:00:00" instead of unix seconds fail the UInt32 dtype,
+    # they are read once more with the time columns as text and convert_empty_time parses them per chunk
+    rows = progress.rows
+    try:
+        return read(read_columns(names))
+    except ValueError:
+        progress.rows = rows
+        return read(read_columns(names, time_text=True))
+
+
+def split_byte_ranges(csv_file: str, parts: int) -> list[tuple[int, int]]:
+    # line aligned byte ranges behind the header, CDR fields never contain quoted line breaks
+    file_size = os.path.getsize(csv_file)
+    with open(csv_file, "rb") as f:
+        f.readline()
+        bounds = [f.tell()]
+        for i in range(1, parts):
+            f.seek(bounds[0] + (file_size - bounds[0]) * i // parts)
+            f.readline()
+            if bounds[-1] < f.tell() < file_size:
+                bounds.append(f.tell())
+    bounds.append(file_size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def parse_byte_range(csv_file: str, start: int, end: int, names: list[str], delimiter: str,
+                     encoding: str, chunk_size: int) -> Tuple[pd.DataFrame, int, dict[str, float]]:
+    # runs in a worker process, the stage timings travel back with the result
+    progress = LoadProgress()
+    with progress.stage("read"):
         with open(csv_file, "rb") as f:
-            for line in f:
-                detector.feed(line)
-                if detector.done:
-                    break
-        detector.close()
-        result = detector.result
-        callback(f"Versuche mit '{result['encoding']}'...")
+            f.seek(start)
+            data = f.read(end - start)
+    frame, rows = parse_bytes(data, names, delimiter, encoding, chunk_size, progress)
+    return frame, rows, progress.timings
+
+
+def parse_bytes(data: bytes, names: list[str], delimiter: str, encoding: str, chunk_size: int,
+                progress: LoadProgress) -> Tuple[pd.DataFrame, int]:
+    # header-less csv rows, returns the frame and the number of rows read
+    def read(columns: dict[str, str]) -> Tuple[pd.DataFrame, int]:
+        with progress.stage("read"):
+            reader = pd.read_csv(  # type: ignore
+                io.BytesIO(data), header=None, names=names, chunksize=chunk_size, usecols=[*columns],
+                dtype=columns, delimiter=delimiter, encoding=encoding, encoding_errors=DECODE_ERRORS
+            )
+        return parse_chunks(reader, progress)
+
+    return read_with_time_text(read, names, progress)
+
+
+def parse_chunks(reader: Any, progress: LoadProgress) -> Tuple[pd.DataFrame, int]:
+    chunks = []
+    rows = 0
+    chunk_iter = iter(reader)
+    while True:
+        with progress.stage("read"):
+            chunk = next(chunk_iter, None)
+        if chunk is None:
+            break
+        rows += len(chunk)
+        chunks.append(transform_chunk(chunk, progress))
+    with progress.stage("concat"):
+        return concat_frames(chunks), rows
+
+
+def process_parallel(csv_file: str, progress: LoadProgress, delimiter: str, encoding: str, chunk_size: int,
+                     workers: int) -> pd.DataFrame:
+    names = read_header(csv_file, delimiter, encoding)
+    ranges = split_byte_ranges(csv_file, max(workers, os.path.getsize(csv_file) // PARALLEL_RANGE_SIZE))
+    results: list[Optional[Tuple[pd.DataFrame, int]]] = [None] * len(ranges)
+    bytes_done = ranges[0][0] if ranges else 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(parse_byte_range, csv_file, start, end, names, delimiter, encoding, chunk_size): i
+            for i, (start, end) in enumerate(ranges)
+        }
         try:
-            df = process_chunks(
+            for future in as_completed(futures):
+                i = futures[future]
+                frame, rows, timings = future.result()
+                results[i] = frame, rows
+                progress.add_timings(timings)
+                bytes_done += ranges[i][1] - ranges[i][0]
+                progress.advance(bytes_done, len(frame))
+        except BaseException:
+            # failed or cancelled from a progress hook, ranges that have not started yet are dropped
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    # merge in file order, shifting each range's row numbers behind the rows of the ranges before it
+    with progress.stage("concat"):
+        frames = []
+        offset = 0
+        for frame, rows in results:  # type: ignore
+            frame.index += offset
+            frames.append(frame)
+            offset += rows
+        return concat_frames([frame for frame in frames if not frame.empty])
+
+
+def read_file(csv_file: str, progress: LoadProgress, delimiter: str, encoding: str, chunk_size: int,
+              workers: int) -> pd.DataFrame:
+    if workers > 1 and os.path.getsize(csv_file) >= PARALLEL_MIN_FILE_SIZE:
+        return process_parallel(csv_file, progress, delimiter, encoding, chunk_size, workers)
+
+    def read(columns: dict[str, str]) -> pd.DataFrame:
+        with open(csv_file, "rb") as f:
+            return process_chunks(
                 reader=pd.read_csv(  # type: ignore
-                    csv_file, chunksize=chunk_size, usecols=[*req_cols], dtype=req_cols, converters=converters,
-                    delimiter=dialect.delimiter, encoding=result["encoding"]
-                ), callback=callback, chunk_size=chunk_size
+                    f, chunksize=chunk_size, usecols=[*columns], dtype=columns,
+                    delimiter=delimiter, encoding=encoding, encoding_errors=DECODE_ERRORS
+                ), progress=progress, source=f
             )
-        except Exception as e:
-            error_message = ShowErrorPopup("Fehler", f"Datei kann nicht geladen werden: {str(e)}")
+
+    return read_with_time_text(read, read_header(csv_file, delimiter, encoding), progress)
+
+
+@overload
+def load_data(csv_file: str, callback: Any, as_dataframe: Literal[True], full: bool = ...,
+              chunk_size: Optional[int] = ..., use_cache: bool = ..., workers: Optional[int] = ...,
+              hooks: Optional[list[Hook]] = ...) -> FrameResult: ...
+
+
+@overload
+def load_data(csv_file: str, callback: Any, as_dataframe: bool = ..., full: bool = ...,
+              chunk_size: Optional[int] = ..., use_cache: bool = ..., workers: Optional[int] = ...,
+              hooks: Optional[list[Hook]] = ...) -> LoadResult: ...
+
+
+def load_data(csv_file: str, callback: Any, as_dataframe: bool = False, full: bool = False,
+              chunk_size: Optional[int] = None, use_cache: bool = True, workers: Optional[int] = None,
+              hooks: Optional[list[Hook]] = None) -> LoadResult:
+    # callback gets one line of text per progress step, hooks get the structured ProgressEvent
+    text_hooks = [lambda event: callback(event.message)] if callback else []
+    progress = LoadProgress(os.path.getsize(csv_file), [*text_hooks, *(hooks or [])])
+    if use_cache:
+        with progress.stage("cache"):
+            try:
+                cached = load_cached(csv_file, PARSER_VERSION)
+            except OSError:
+                cached = None
+        if cached is not None:
+            progress.rows = len(cached)
+            progress.emit("cache")
+            if not as_dataframe:
+                with progress.stage("table"):
+                    cached = convert_to_table(cached, full)
+            progress.emit("done")
+            return (cached, None) if as_dataframe else cached
+
+    df = pd.DataFrame()
+    if chunk_size is None:
+        chunk_size = choose_chunk_size(csv_file)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    error_message = None
+    try:
+        # empty or binary files already fail while sniffing
+        progress.emit("sniff")
+        with progress.stage("sniff"):
+            encoding, dialect = sniff_file(csv_file)
+        df = read_file(csv_file, progress, dialect.delimiter, encoding, chunk_size, workers)
     except Exception as e:
         error_message = ShowErrorPopup("Fehler", f"Datei kann nicht geladen werden: {str(e)}")
+    if use_cache and error_message is None and not df.empty:
+        with progress.stage("cache"):
+            try:
+                store_cached(csv_file, PARSER_VERSION, df)
+            except OSError:
+                # a read-only or full cache directory must never break loading
+                pass
+    if as_dataframe:
+        progress.emit("done")
+        return df, error_message
+    else:
+        with progress.stage("table"):
+            table = convert_to_table(df, full)
+        progress.emit("done")
+        return table
+
+
+def list_csv_files(paths: list[str]) -> list[str]:
+    # directories contribute their .csv files, sorted by name so rolling CDR files come in the order they were written
+    csv_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            csv_files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".csv")
+            ))
+        else:
+            csv_files.append(path)
+    return csv_files
+
+
+def batch_files(csv_files: list[str], batch_size: int) -> list[list[str]]:
+    # neighbouring files of about batch_size bytes together, a big file is a batch of its own
+    batches: list[list[str]] = [[]]
+    size = 0
+    for csv_file in csv_files:
+        file_size = os.path.getsize(csv_file)
+        if batches[-1] and size + file_size > batch_size:
+            batches.append([])
+            size = 0
+        batches[-1].append(csv_file)
+        size += file_size
+    return batches
+
+
+def call_identity(columns: list[str]) -> list[str]:
+    if not all(column in columns for column in CALL_ID_COLUMNS[:2]):
+        return []
+    if CALL_ID_COLUMNS[2] in columns:
+        return CALL_ID_COLUMNS
+    # exports without the leg id, the legs of one call still differ in their times
+    return [*CALL_ID_COLUMNS[:2], "dateTimeOrigination", "dateTimeDisconnect"]
+
+
+def drop_duplicate_calls(df: pd.DataFrame) -> pd.DataFrame:
+    # hash index over the call identity, the first record wins; records without an id are all kept
+    identity = call_identity(list(df.columns))
+    if df.empty or not identity:
+        return df
+    duplicated = df.duplicated(subset=identity).to_numpy() & (df["globalCallID_callId"].to_numpy() != 0)
+    return df[~duplicated] if duplicated.any() else df
+
+
+def merge_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    # one frame in time order without repeated records; call id columns that not every file has are dropped
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    columns = [column for column in frames[0].columns if all(column in frame.columns for frame in frames)]
+    df = drop_duplicate_calls(concat_frames([frame[columns] for frame in frames]))
+    origination = df["dateTimeOrigination"]
+    if not origination.is_monotonic_increasing:
+        # stable, records of the same second keep their file order
+        df = df.take(np.argsort(origination.to_numpy(), kind="stable"))
+    return df.reset_index(drop=True)
+
+
+def read_body(csv_file: str) -> bytes:
+    # everything behind the header line, always ending with a line break so bodies can be joined
+    with open(csv_file, "rb") as f:
+        f.readline()
+        data = f.read()
+    return data if not data or data.endswith(b"\n") else data + b"\r\n"
+
+
+def parse_small_files(csv_files: list[str], progress: LoadProgress) -> Tuple[list[pd.DataFrame], int]:
+    # per file setup (sniffing, the csv reader, converting a tiny chunk) would cost more than the parsing itself,
+    # neighbouring files with the same encoding, dialect and header are parsed as one stream instead
+    groups: list[tuple[tuple[str, str, tuple[str, ...]], list[str]]] = []
+    for csv_file in csv_files:
+        if os.path.getsize(csv_file) == 0:
+            continue
+        with progress.stage("sniff"):
+            try:
+                encoding, dialect = sniff_file(csv_file)
+                names = read_header(csv_file, dialect.delimiter, encoding)
+            except Exception as e:
+                raise ValueError(f"{os.path.basename(csv_file)}: {str(e)}")
+        layout = (encoding, dialect.delimiter, tuple(names))
+        if groups and groups[-1][0] == layout:
+            groups[-1][1].append(csv_file)
+        else:
+            groups.append((layout, [csv_file]))
+    frames = []
+    rows = 0
+    for (encoding, delimiter, header), group in groups:
+        with progress.stage("read"):
+            data = b"".join(read_body(csv_file) for csv_file in group)
+        encoding = body_encoding(encoding)
+        chunk_size = max(MIN_CHUNK_SIZE, rows_per_budget(row_width(data[:CHUNK_SIZE_SAMPLE])))
+        try:
+            frame, group_rows = parse_bytes(data, list(header), delimiter, encoding, chunk_size, progress)
+        except Exception as e:
+            raise ValueError(f"{os.path.basename(group[0])} ff.: {str(e)}")
+        frames.append(frame)
+        rows += group_rows
+    return frames, rows
+
+
+def load_batch(csv_files: list[str], use_cache: bool) -> Tuple[pd.DataFrame, int, dict[str, float]]:
+    # runs in a worker process; the batch is merged right away so duplicates never travel back to the main process
+    progress = LoadProgress()
+    if len(csv_files) == 1:
+        # a big file on its own, the single file pipeline with its cache
+        def collect_timings(event: ProgressEvent) -> None:
+            if event.stage == "done":
+                progress.add_timings(event.timings)
+
+        df, error_message = load_data(csv_files[0], None, as_dataframe=True, use_cache=use_cache, workers=1,
+                                      hooks=[collect_timings])
+        if error_message:
+            raise ValueError(f"{os.path.basename(csv_files[0])}: {error_message.message}")
+        frames, rows = [df], len(df)
+    else:
+        frames, rows = parse_small_files(csv_files, progress)
+    with progress.stage("merge"):
+        frame = merge_frames(frames)
+    return frame, rows, progress.timings
+
+
+def read_files(csv_files: list[str], progress: LoadProgress, use_cache: bool, workers: int) -> pd.DataFrame:
+    # small files are parsed in batches so a month of per-minute files costs about as much as one file of that size
+    total_size = sum(os.path.getsize(csv_file) for csv_file in csv_files)
+    batches = batch_files(csv_files, min(PARALLEL_RANGE_SIZE, max(total_size // (workers * 4), 1)))
+    frames: list[pd.DataFrame] = [pd.DataFrame()] * len(batches)
+    bytes_done = 0
+
+    def add_batch(i: int, frame: pd.DataFrame, rows: int, timings: dict[str, float]) -> None:
+        nonlocal bytes_done
+        frames[i] = frame
+        progress.add_timings(timings)
+        bytes_done += sum(os.path.getsize(csv_file) for csv_file in batches[i])
+        progress.advance(bytes_done, rows)
+
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            futures = {pool.submit(load_batch, batch, use_cache): i for i, batch in enumerate(batches)}
+            try:
+                for future in as_completed(futures):
+                    add_batch(futures[future], *future.result())
+            except BaseException:
+                # a broken file or a cancel from a progress hook, batches that have not started yet are dropped
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    else:
+        for i, batch in enumerate(batches):
+            add_batch(i, *load_batch(batch, use_cache))
+    with progress.stage("merge"):
+        return merge_frames(frames)
+
+
+@overload
+def load_files(csv_files: list[str], callback: Any, as_dataframe: Literal[True], full: bool = ...,
+               use_cache: bool = ..., workers: Optional[int] = ...,
+               hooks: Optional[list[Hook]] = ...) -> FrameResult: ...
+
+
+@overload
+def load_files(csv_files: list[str], callback: Any, as_dataframe: bool = ..., full: bool = ...,
+               use_cache: bool = ..., workers: Optional[int] = ...,
+               hooks: Optional[list[Hook]] = ...) -> LoadResult: ...
+
+
+def load_files(csv_files: list[str], callback: Any, as_dataframe: bool = False, full: bool = False,
+               use_cache: bool = True, workers: Optional[int] = None,
+               hooks: Optional[list[Hook]] = None) -> LoadResult:
+    # several files or directories as one table, same results and progress as load_data
+    csv_files = list_csv_files(csv_files)
+    if len(csv_files) == 1:
+        return load_data(csv_files[0], callback, as_dataframe, full, use_cache=use_cache, workers=workers,
+                         hooks=hooks)
+    text_hooks = [lambda event: callback(event.message)] if callback else []
+    progress = LoadProgress(sum(os.path.getsize(csv_file) for csv_file in csv_files), [*text_hooks, *(hooks or [])])
+    if workers is None:
+        workers = os.cpu_count() or 1
+    df = pd.DataFrame()
+    error_message = None
+    if not csv_files:
+        error_message = ShowErrorPopup("Fehler", "Keine CSV-Dateien gefunden")
+    else:
+        try:
+            df = read_files(csv_files, progress, use_cache, workers)
+        except Exception as e:
+            error_message = ShowErrorPopup("Fehler", f"Dateien können nicht geladen werden: {str(e)}")
     if as_dataframe:
+        progress.emit("done")
         return df, error_message
     else:
-        return convert_to_table(df, full)
+        with progress.stage("table"):
+            table = convert_to_table(df, full)
+        progress.emit("done")
+        return table
 #
 # if __name__ == '__main__':
 #     data = load_data("Test_uc_log.csv", callback=lambda x: x, as_dataframe=True)
@@ -0,0 +1,151 @@
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple, Optional
+
+# stdlib only, the benchmarks and headless callers import this without pulling in pandas
+logger = logging.getLogger("cdr_viewer.load")
+
+STAGE_NAMES = {
+    "cache"   : "Cache",
+    "sniff"   : "Encoding",
+    "read"    : "Lesen",
+    "convert" : "Umwandeln",
+    "timezone": "Zeitzone",
+    "concat"  : "Zusammenfügen",
+    "merge"   : "Zusammenführen",
+    "store"   : "Speichern",
+    "table"   : "Tabelle",
+}
+
+
+def peak_rss() -> Optional[int]:
+    # peak resident memory of this process in bytes; on linux ru_maxrss survives exec and would
+    # report the parent's peak, the high water mark in /proc starts fresh with the new program
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return windows_peak_rss()
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def windows_peak_rss() -> Optional[int]:
+    if sys.platform != "win32":
+        return None
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return int(counters.PeakWorkingSetSize)
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def thousands(value: float) -> str:
+    return f"{value:,.0f}".replace(",", ".")
+
+
+class ProgressEvent(NamedTuple):
+    # "cache", "sniff", "read" while chunks come in, "done" once at the end
+    stage: str
+    bytes_done: int
+    total_bytes: int
+    rows: int
+    seconds: float
+    rows_per_second: float
+    eta: Optional[float]
+    peak_rss: Optional[int]
+    # seconds per stage so far; stages running in worker processes are summed over the workers
+    timings: dict[str, float]
+
+    @property
+    def message(self) -> str:
+        # one line for the loading popup
+        if self.stage == "cache":
+            return "Aus Cache geladen..."
+        if self.stage == "sniff":
+            return "Scanne Encoding..."
+        memory = f", {self.peak_rss / 1024 ** 2:.0f} MB" if self.peak_rss else ""
+        if self.stage == "done":
+            return f"{thousands(self.rows)} Zeilen in {self.seconds:.1f} s geladen{memory}"
+        percent = f" ({100 * self.bytes_done / self.total_bytes:.0f}%)" if self.total_bytes else ""
+        eta = f", noch ca. {self.eta:.0f} s" if self.eta is not None else ""
+        return (f"{thousands(self.rows)} Zeilen geladen{percent}\n"
+                f"{thousands(self.rows_per_second)} Zeilen/s{eta}{memory}")
+
+    def summary(self) -> str:
+        return ", ".join(f"{STAGE_NAMES.get(name, name)} {seconds:.2f} s" for name, seconds in self.timings.items())
+
+
+Hook = Callable[[ProgressEvent], None]
+
+
+class LoadProgress:
+    # stage timings are always collected (a few perf_counter calls per chunk), events are only built
+    # and the memory is only looked at when somebody listens
+    def __init__(self, total_bytes: int = 0, hooks: Optional[list[Hook]] = None):
+        self.total_bytes = total_bytes
+        self.hooks = list(hooks or [])
+        self.timings: dict[str, float] = {}
+        self.bytes_done = 0
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def add_timings(self, timings: dict[str, float]) -> None:
+        for name, seconds in timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def advance(self, bytes_done: Optional[int] = None, rows: int = 0) -> None:
+        if bytes_done is not None:
+            self.bytes_done = bytes_done
+        self.rows += rows
+        self.emit("read")
+
+    def emit(self, stage: str) -> None:
+        if not self.hooks:
+            return
+        seconds = time.perf_counter() - self.started
+        eta = None
+        if stage == "read" and 0 < self.bytes_done < self.total_bytes:
+            eta = seconds * (self.total_bytes - self.bytes_done) / self.bytes_done
+        event = ProgressEvent(stage, self.bytes_done, self.total_bytes, self.rows, seconds,
+                              self.rows / seconds if seconds else 0.0, eta, peak_rss(), dict(self.timings))
+        for hook in self.hooks:
+            hook(event)
+
+
+def log_event(event: ProgressEvent) -> None:
+    # hook for headless runs, logging.basicConfig(level=logging.INFO) makes the events visible
+    if event.stage == "done":
+        logger.info("%s (%s)", event.message, event.summary())
+    else:
+        logger.info(event.message.replace("\n", ", "))
@@ -0,0 +1,259 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, Union, cast
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+from pandas.api.types import is_datetime64_any_dtype, is_timedelta64_dtype
+
+from search import SearchIndex, TimeIndex
+
+# compiled plans only depend on the query text and the column kinds, they survive reloads
+PLAN_CACHE_SIZE = 64
+
+OR_PATTERN = re.compile(r"\s+(?:ODER|OR)\s+", re.IGNORECASE)
+AND_PATTERN = re.compile(r"\s+(?:UND|AND)\s+", re.IGNORECASE)
+# Spalte:Wert, Spalte>Wert, ... the column name may contain spaces ("Gewählte Nummer")
+PREDICATE_PATTERN = re.compile(r"^(?P<column>[^:<>=]+?)\s*(?P<op>:|>=|<=|>|<|=)\s*(?P<value>.*)$")
+RANGE_SEPARATOR = ".."
+
+# format, precision of the format and whether the value is a time of day without a date
+TIMESTAMP_BOUND_FORMATS = [
+    ("%d.%m.%y %H:%M:%S", timedelta(seconds=1), False),
+    ("%d.%m.%Y %H:%M:%S", timedelta(seconds=1), False),
+    ("%d.%m.%y %H:%M", timedelta(minutes=1), False),
+    ("%d.%m.%Y %H:%M", timedelta(minutes=1), False),
+    ("%d.%m.%y", timedelta(days=1), False),
+    ("%d.%m.%Y", timedelta(days=1), False),
+    ("%H:%M:%S", timedelta(seconds=1), True),
+    ("%H:%M", timedelta(minutes=1), True),
+]
+
+
+class QueryError(ValueError):
+    pass
+
+
+class ColumnSpec(NamedTuple):
+    name: str
+    column: str
+    # "time", "duration" or "text", only typed columns can be compared
+    kind: str
+
+
+class Bound(NamedTuple):
+    # a value covers everything up to its precision, "14.03.24" is the whole day
+    start: Union[np.datetime64, np.timedelta64]
+    end: Union[np.datetime64, np.timedelta64]
+    time_of_day: bool = False
+
+
+class Contains(NamedTuple):
+    column: Optional[str]
+    term: str
+
+    def evaluate(self, engine: "QueryEngine") -> NDArray[np.bool_]:
+        mask = np.zeros(engine.size, dtype=bool)
+        mask[engine.index.search(self.term, self.column)] = True
+        return mask
+
+
+class Wildcard(NamedTuple):
+    column: Optional[str]
+    pattern: re.Pattern[str]
+    literal: str
+
+    def evaluate(self, engine: "QueryEngine") -> NDArray[np.bool_]:
+        mask = np.zeros(engine.size, dtype=bool)
+        columns = [self.column] if self.column else list(engine.index.columns)
+        for name in columns:
+            column = engine.index.columns[name]
+            value_ids = column.matching_pattern(self.pattern, self.literal)
+            if len(value_ids):
+                mask |= column.row_mask(value_ids)
+        return mask
+
+
+class Range(NamedTuple):
+    column: str
+    lower: Optional[Union[np.datetime64, np.timedelta64]]
+    upper: Optional[Union[np.datetime64, np.timedelta64]]
+    time_of_day: bool = False
+
+    def evaluate(self, engine: "QueryEngine") -> NDArray[np.bool_]:
+        time_index = engine.time_indexes.get(self.column)
+        if time_index is not None and not self.time_of_day:
+            # bounds without a time of day are timestamps
+            lower = cast(Optional[np.datetime64], self.lower)
+            upper = cast(Optional[np.datetime64], self.upper)
+            return time_index.window_mask(lower, upper)
+        values = engine.df[self.column].to_numpy()
+        if self.time_of_day:
+            values = values - values.astype("datetime64[D]")
+        # lower bound inclusive, upper bound exclusive, missing values never match
+        mask = np.ones(len(values), dtype=bool)
+        if self.lower is not None:
+            mask &= values >= self.lower
+        if self.upper is not None:
+            mask &= values < self.upper
+        return mask
+
+
+class And(NamedTuple):
+    parts: tuple["Predicate", ...]
+
+    def evaluate(self, engine: "QueryEngine") -> NDArray[np.bool_]:
+        mask = self.parts[0].evaluate(engine)
+        for part in self.parts[1:]:
+            if not mask.any():
+                break
+            mask &= part.evaluate(engine)
+        return mask
+
+
+class Or(NamedTuple):
+    parts: tuple["Predicate", ...]
+
+    def evaluate(self, engine: "QueryEngine") -> NDArray[np.bool_]:
+        mask = self.parts[0].evaluate(engine)
+        for part in self.parts[1:]:
+            mask |= part.evaluate(engine)
+        return mask
+
+
+Predicate = Union[Contains, Wildcard, Range, And, Or]
+
+
+def column_kind(column: pd.Series) -> str:
+    if is_timedelta64_dtype(column):
+        return "duration"
+    if is_datetime64_any_dtype(column):
+        return "time"
+    return "text"
+
+
+def parse_timestamp(value: str) -> Bound:
+    for fmt, precision, time_of_day in TIMESTAMP_BOUND_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        start: Union[np.datetime64, np.timedelta64]
+        if time_of_day:
+            start = np.timedelta64(parsed - parsed.replace(hour=0, minute=0, second=0), "ns")
+        else:
+            start = np.datetime64(parsed, "ns")
+        return Bound(start, start + np.timedelta64(precision, "ns"), time_of_day)
+    raise QueryError(f"Ungültiger Zeitpunkt: {value}")
+
+
+def parse_duration(value: str) -> Bound:
+    # HH:MM:SS like the table shows it, MM:SS or plain seconds, hours may exceed 24
+    parts = value.split(":")
+    if len(parts) > 3 or not all(part.isdigit() for part in parts):
+        raise QueryError(f"Ungültige Dauer: {value}")
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    start = np.timedelta64(seconds, "s").astype("timedelta64[ns]")
+    return Bound(start, start + np.timedelta64(1, "s"))
+
+
+def parse_bound(spec: ColumnSpec, value: str) -> Bound:
+    return parse_duration(value) if spec.kind == "duration" else parse_timestamp(value)
+
+
+def compile_comparison(spec: ColumnSpec, op: str, value: str) -> Range:
+    if spec.kind == "text":
+        raise QueryError(f"Vergleiche sind für {spec.name} nicht möglich")
+    bound = parse_bound(spec, value)
+    if op == ">":
+        return Range(spec.column, bound.end, None, bound.time_of_day)
+    if op == ">=":
+        return Range(spec.column, bound.start, None, bound.time_of_day)
+    if op == "<":
+        return Range(spec.column, None, bound.start, bound.time_of_day)
+    if op == "<=":
+        return Range(spec.column, None, bound.end, bound.time_of_day)
+    return Range(spec.column, bound.start, bound.end, bound.time_of_day)
+
+
+def compile_range(spec: ColumnSpec, value: str) -> Range:
+    # von..bis, both ends inclusive at their precision, either end may be left open
+    lower_text, upper_text = (text.strip() for text in value.split(RANGE_SEPARATOR, 1))
+    lower = parse_bound(spec, lower_text) if lower_text else None
+    upper = parse_bound(spec, upper_text) if upper_text else None
+    bound = lower or upper
+    if bound is None:
+        raise QueryError(f"Ungültiger Bereich: {value}")
+    if lower and upper and lower.time_of_day != upper.time_of_day:
+        raise QueryError(f"Bereich mischt Uhrzeit und Datum: {value}")
+    return Range(spec.column, lower.start if lower else None, upper.end if upper else None, bound.time_of_day)
+
+
+def compile_text(column: Optional[str], value: str) -> Union[Contains, Wildcard]:
+    term = value.lower()
+    if "*" not in term and "?" not in term:
+        return Contains(column, term)
+    # * stands for any number of characters, ? for exactly one; the pattern has to cover the whole value,
+    # so 10:* starts with 10: and *sep* contains sep anywhere
+    pattern = re.compile("".join(
+        ".*" if char == "*" else "." if char == "?" else re.escape(char) for char in term
+    ))
+    literal = max(re.split(r"[*?]", term), key=len)
+    return Wildcard(column, pattern, literal)
+
+
+def compile_predicate(text: str, columns: tuple[ColumnSpec, ...]) -> Predicate:
+    match = PREDICATE_PATTERN.match(text)
+    if not match:
+        return compile_text(None, text)
+    name, op, value = match.group("column", "op", "value")
+    spec = next((spec for spec in columns if spec.name.lower() == name.lower()), None)
+    if spec is None:
+        # times like 10:12 or numbers are plain search terms, anything that looks like a name is a typo
+        if name[0].isalpha():
+            raise QueryError(f"Ungültiger Spaltenname: {name}")
+        return compile_text(None, text)
+    if op != ":":
+        return compile_comparison(spec, op, value)
+    if RANGE_SEPARATOR in value and spec.kind != "text":
+        return compile_range(spec, value)
+    return compile_text(spec.column, value)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_query(text: str, columns: tuple[ColumnSpec, ...]) -> Predicate:
+    # UND binds stronger than ODER, a query without keywords is a single search term like before
+    alternatives = []
+    for alternative in OR_PATTERN.split(text.strip()):
+        texts = [part.strip() for part in AND_PATTERN.split(alternative)]
+        if not all(texts):
+            raise QueryError("Unvollständige Suchanfrage")
+        parts = tuple(compile_predicate(part, columns) for part in texts)
+        alternatives.append(parts[0] if len(parts) == 1 else And(parts))
+    return alternatives[0] if len(alternatives) == 1 else Or(tuple(alternatives))
+
+
+def column_specs(df: pd.DataFrame, columns: dict[str, str]) -> tuple[ColumnSpec, ...]:
+    return tuple(ColumnSpec(name, column, column_kind(df[column])) for name, column in columns.items())
+
+
+class QueryEngine:
+    def __init__(self, df: pd.DataFrame, index: SearchIndex, columns: dict[str, str],
+                 time_indexes: Optional[list[TimeIndex]] = None):
+        self.df = df
+        self.index = index
+        # date ranges on these columns are answered by binary search instead of comparing every row
+        self.time_indexes = {time_index.name: time_index for time_index in time_indexes or []}
+        self.size = len(df)
+        self.columns = column_specs(df, columns)
+
+    def search(self, text: str, check: Optional[Callable[[], None]] = None) -> NDArray[np.intp]:
+        # row positions matching the query, raises QueryError for queries that can not be compiled;
+        # check only matters for the block scan of StoreEngine, in memory a search is a single pass
+        if not text.strip():
+            return np.arange(self.size)
+        return np.flatnonzero(compile_query(text, self.columns).evaluate(self))
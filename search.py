@@ -0,0 +1,483 @@
+import copy
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+from pandas.api.types import is_categorical_dtype, is_datetime64_any_dtype, is_timedelta64_dtype
+
+from parser import (DATE_FORMAT, DISPLAY_FORMATS, NANOSECONDS, SECONDS_PER_DAY, TIME_FORMAT, TIMESTAMP_FORMAT,
+                    format_column, times_of_day)
+
+NGRAM = 3
+# 21 bits per unicode code point, three of them fit into one int64 key
+CODE_POINT_BITS = 21
+# recent (query, rows) pairs, typing one more digit only filters the rows of the previous query
+RESULT_CACHE_SIZE = 16
+# everything a shown timestamp consists of, other terms never match a timestamp column
+TIMESTAMP_CHARS = frozenset("0123456789.: ")
+
+
+def ngram_keys(chars: NDArray[np.int64]) -> NDArray[np.int64]:
+    keys = chars[..., :-2] << (2 * CODE_POINT_BITS)
+    keys |= chars[..., 1:-1] << CODE_POINT_BITS
+    keys |= chars[..., 2:]
+    return keys
+
+
+def as_code_points(values: NDArray[np.str_]) -> NDArray[np.int64]:
+    width = values.dtype.itemsize // 4
+    return values.view(np.uint32).reshape(len(values), width).astype(np.int64)
+
+
+class ColumnIndex:
+    # trigram -> distinct value postings for one column, rows are reached through the value codes
+    def __init__(self, column: pd.Series, trigrams: bool = True):
+        if is_categorical_dtype(column):
+            # already dictionary encoded, the categories are the distinct values
+            codes, uniques = column.cat.codes.to_numpy(), column.cat.categories
+        else:
+            codes, uniques = pd.factorize(column)
+        # search what the table shows, typed values are formatted once per distinct value and
+        # values that look the same afterwards (e.g. equal times on different days) are merged
+        text_codes, text_values = pd.factorize(self.format_values(column.name, uniques))
+        self.codes: NDArray[np.intp] = np.append(text_codes, -1)[codes]
+        # distinct texts, TimestampIndex keeps distinct seconds in here instead
+        self.values: NDArray[Any] = np.asarray(text_values, dtype=str)
+        # without trigrams every search compares all distinct values, cheaper for an index that is used only once
+        self.trigrams = trigrams
+        self.keys, self.postings = self.build_postings(self.values if trigrams else self.values[:0])
+        # value -> id, only built once rows are appended; shared between the extended copies
+        self.lookup: Optional[dict[str, int]] = None
+
+    @staticmethod
+    def format_values(name: Any, uniques: Any) -> pd.Series:
+        return format_column(str(name), pd.Series(uniques, name=name)).astype(str).str.lower()
+
+    def extended(self, column: pd.Series) -> "ColumnIndex":
+        # a copy that also covers the appended rows in column; only values never seen before are added
+        # to the postings, the sorted arrays are merged instead of sorted again
+        codes, uniques = pd.factorize(column)
+        text = self.format_values(column.name, uniques).to_numpy()
+        if self.lookup is None:
+            self.lookup = {value: i for i, value in enumerate(self.values.tolist())}
+        ids = np.empty(len(text), dtype=np.int64)
+        added: list[str] = []
+        for i, value in enumerate(text):
+            value_id = self.lookup.get(value, -1)
+            # ids of copies that were thrown away point past the values of this one
+            if not 0 <= value_id < len(self.values):
+                value_id = len(self.values) + len(added)
+                self.lookup[value] = value_id
+                added.append(value)
+            ids[i] = value_id
+        index = copy.copy(self)
+        index.codes = np.concatenate([self.codes, np.append(ids, -1)[codes]])
+        if added:
+            new_values = np.asarray(added, dtype=str)
+            new_keys, new_postings = self.build_postings(new_values if self.trigrams else new_values[:0])
+            # new ids are above every existing id, inserting behind equal keys keeps (key, id) order
+            positions = np.searchsorted(self.keys, new_keys, side="right")
+            index.keys = np.insert(self.keys, positions, new_keys)
+            index.postings = np.insert(self.postings, positions, new_postings + len(self.values))
+            index.values = np.concatenate([self.values, new_values])
+        return index
+
+    @staticmethod
+    def build_postings(values: NDArray[np.str_]) -> tuple[NDArray[np.int64], NDArray[np.intp]]:
+        if len(values) == 0 or values.dtype.itemsize // 4 < NGRAM:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        chars = as_code_points(values)
+        keys = ngram_keys(chars)
+        ids = np.broadcast_to(np.arange(len(values))[:, None], keys.shape)
+        # fixed width strings are padded with \0, trigrams running into the padding do not exist
+        present = chars[:, NGRAM - 1:] != 0
+        keys, ids = keys[present], ids[present]
+        order = np.lexsort((ids, keys))
+        keys, ids = keys[order], ids[order]
+        distinct = np.ones(len(keys), dtype=bool)
+        distinct[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+        return keys[distinct], ids[distinct]
+
+    def candidates(self, term: str) -> NDArray[np.intp]:
+        if len(term) < NGRAM or not self.trigrams:
+            return np.arange(len(self.values))
+        term_keys = np.unique(ngram_keys(as_code_points(np.asarray([term], dtype=str)))[0])
+        lower = np.searchsorted(self.keys, term_keys, side="left")
+        upper = np.searchsorted(self.keys, term_keys, side="right")
+        # intersect the posting lists, shortest first
+        result: Optional[NDArray[np.intp]] = None
+        for start, end in sorted(zip(lower, upper), key=lambda bounds: bounds[1] - bounds[0]):
+            postings = self.postings[start:end]
+            result = postings if result is None else np.intersect1d(result, postings, assume_unique=True)
+            if len(result) == 0:
+                break
+        return result if result is not None else np.arange(len(self.values))
+
+    def matching_values(self, term: str) -> NDArray[np.intp]:
+        candidates = self.candidates(term)
+        if len(candidates) == 0:
+            return candidates
+        # the trigrams only narrow things down, the final check is a plain substring test
+        return candidates[np.char.find(self.values[candidates], term) >= 0]
+
+    def matching_pattern(self, pattern: re.Pattern[str], literal: str) -> NDArray[np.intp]:
+        # wildcard search over the whole value, the longest literal part of the pattern still narrows down
+        # through the trigrams
+        candidates = self.candidates(literal)
+        if len(candidates) == 0:
+            return candidates
+        matches: NDArray[np.bool_] = pd.Series(self.values[candidates]).str.fullmatch(pattern).to_numpy(dtype=bool)
+        return candidates[matches]
+
+    def refine(self, value_ids: NDArray[np.intp], term: str) -> NDArray[np.intp]:
+        # the values among value_ids that also contain term, for a query that extends a cached one
+        if not len(value_ids):
+            return value_ids
+        return value_ids[np.char.find(self.values[value_ids], term) >= 0]
+
+    def row_mask(self, value_ids: NDArray[np.intp], rows: Optional[NDArray[np.intp]] = None) -> NDArray[np.bool_]:
+        hits = np.zeros(len(self.values) + 1, dtype=bool)
+        hits[value_ids] = True
+        # missing values have code -1 and land on the trailing False
+        return hits[self.codes if rows is None else self.codes[rows]]
+
+
+@lru_cache(maxsize=1)
+def time_texts() -> NDArray[np.str_]:
+    return np.asarray(times_of_day(), dtype=str)
+
+
+@lru_cache(maxsize=1)
+def time_chars() -> NDArray[np.uint8]:
+    # digits and colons only, one byte per character is enough
+    return as_code_points(time_texts()).astype(np.uint8)
+
+
+def chars_contain(chars: NDArray[np.integer[Any]], term: str, start: bool = False,
+                  end: bool = False) -> NDArray[np.bool_]:
+    # substring test on code points of equally long texts, np.char loops in python over every value;
+    # start/end only test the beginning/end of the texts
+    width = chars.shape[1]
+    term_chars = np.array([ord(char) for char in term], dtype=np.int64)
+    if len(term_chars) > width:
+        return np.zeros(len(chars), dtype=bool)
+    if start:
+        offsets = [0]
+    elif end:
+        offsets = [width - len(term_chars)]
+    else:
+        offsets = list(range(width - len(term_chars) + 1))
+    hits = np.zeros(len(chars), dtype=bool)
+    for offset in offsets:
+        hits |= (chars[:, offset:offset + len(term_chars)] == term_chars).all(axis=1)
+    return hits
+
+
+class TimestampIndex(ColumnIndex):
+    # timestamps are nearly unique, their texts and trigrams would take several times the memory of the frame;
+    # the distinct whole seconds are kept instead and a term is matched against the day texts and the table of
+    # all times of day, the shown text is "dd.mm.yy HH:MM:SS" or only the time of day
+    def __init__(self, column: pd.Series, with_day: bool = True):
+        values = column.to_numpy(dtype="datetime64[ns]")
+        present = ~np.isnat(values)
+        self.codes = np.full(len(values), -1, dtype=np.int32)
+        codes, uniques = pd.factorize(values[present].view("int64") // NANOSECONDS)
+        self.codes[present] = codes
+        # distinct timestamps in seconds, the value ids are positions in here
+        self.values = np.asarray(uniques, dtype=np.int64)
+        self.with_day = with_day
+        day_codes, days = pd.factorize(self.values // SECONDS_PER_DAY)
+        self.value_days = day_codes.astype(np.int32)
+        self.days = self.day_texts(np.asarray(days, dtype=np.int64))
+        # sorted copy of values and their ids, only built once rows are appended
+        self.sorted_values: Optional[NDArray[np.int64]] = None
+        self.sorted_ids: Optional[NDArray[np.int32]] = None
+
+    @staticmethod
+    def day_texts(days: NDArray[np.int64]) -> NDArray[np.str_]:
+        # the day with the separating blank, as the timestamp text starts
+        text = pd.to_datetime(days * SECONDS_PER_DAY, unit="s").strftime(DATE_FORMAT + " ")
+        return np.asarray(text, dtype=str)
+
+    def day_numbers(self) -> NDArray[np.int64]:
+        # days since 1970 in the order of self.days
+        numbers = np.zeros(len(self.days), dtype=np.int64)
+        numbers[self.value_days] = self.values // SECONDS_PER_DAY
+        return numbers
+
+    def extended(self, column: pd.Series) -> "TimestampIndex":
+        # a copy that also covers the appended rows in column, only new seconds and days are added;
+        # lookups go through sorted arrays, a dict over millions of seconds would cost more than the index
+        tail = TimestampIndex(column, self.with_day)
+        if not len(self.values):
+            tail.codes = np.concatenate([self.codes, tail.codes])
+            return tail
+        if self.sorted_values is None or self.sorted_ids is None:
+            self.sorted_ids = np.argsort(self.values, kind="stable").astype(np.int32)
+            self.sorted_values = self.values[self.sorted_ids]
+        known_days = {day: i for i, day in enumerate(self.day_numbers().tolist())}
+        days = list(self.days)
+        day_ids = np.empty(len(tail.days), dtype=np.int32)
+        for i, (number, text) in enumerate(zip(tail.day_numbers().tolist(), tail.days)):
+            if number not in known_days:
+                known_days[number] = len(days)
+                days.append(text)
+            day_ids[i] = known_days[number]
+        positions = np.minimum(np.searchsorted(self.sorted_values, tail.values), len(self.values) - 1)
+        found = self.sorted_values[positions] == tail.values
+        added = np.flatnonzero(~found)
+        ids = np.where(found, self.sorted_ids[positions], 0).astype(np.int32)
+        ids[added] = len(self.values) + np.arange(len(added), dtype=np.int32)
+        index = copy.copy(self)
+        index.codes = np.concatenate([self.codes, np.append(ids, -1)[tail.codes]])
+        index.values = np.concatenate([self.values, tail.values[added]])
+        index.value_days = np.concatenate([self.value_days, day_ids[tail.value_days[added]]])
+        index.days = np.asarray(days, dtype=str)
+        insert = np.searchsorted(self.sorted_values, tail.values[added])
+        index.sorted_values = np.insert(self.sorted_values, insert, tail.values[added])
+        index.sorted_ids = np.insert(self.sorted_ids, insert, ids[added])
+        return index
+
+    def part_hits(self, term: str) -> list[tuple[Optional[NDArray[np.bool_]], Optional[NDArray[np.bool_]]]]:
+        # (days, times of day) that together contain term, None stands for any; the text has a single blank,
+        # so a term running from the day into the time is split right behind its blank
+        if not set(term) <= TIMESTAMP_CHARS:
+            return []
+        times = time_chars()
+        parts: list[tuple[Optional[NDArray[np.bool_]], Optional[NDArray[np.bool_]]]] = [
+            (None, chars_contain(times, term))
+        ]
+        if self.with_day and len(self.days):
+            days = as_code_points(self.days)
+            parts.append((chars_contain(days, term), None))
+            if " " in term:
+                split = term.index(" ") + 1
+                parts.append((chars_contain(days, term[:split], end=True),
+                              chars_contain(times, term[split:], start=True)))
+        return parts
+
+    def value_hits(self, term: str, value_ids: Optional[NDArray[np.intp]] = None) -> NDArray[np.bool_]:
+        values = self.values if value_ids is None else self.values[value_ids]
+        hits = np.zeros(len(values), dtype=bool)
+        for day_hits, time_hits in self.part_hits(term):
+            if (day_hits is not None and not day_hits.any()) or (time_hits is not None and not time_hits.any()):
+                continue
+            if day_hits is None:
+                part = np.ones(len(values), dtype=bool)
+            else:
+                part = day_hits[self.value_days if value_ids is None else self.value_days[value_ids]]
+            if time_hits is not None:
+                part &= time_hits[values % SECONDS_PER_DAY]
+            hits |= part
+        return hits
+
+    def texts(self, value_ids: NDArray[np.intp]) -> NDArray[np.str_]:
+        times: NDArray[np.str_] = time_texts()[self.values[value_ids] % SECONDS_PER_DAY]
+        if not self.with_day:
+            return times
+        return np.char.add(self.days[self.value_days[value_ids]], times)
+
+    def candidates(self, term: str) -> NDArray[np.intp]:
+        if not term:
+            return np.arange(len(self.values))
+        return np.flatnonzero(self.value_hits(term))
+
+    def matching_values(self, term: str) -> NDArray[np.intp]:
+        return self.candidates(term)
+
+    def matching_pattern(self, pattern: re.Pattern[str], literal: str) -> NDArray[np.intp]:
+        # only the values containing the literal part are put together as text for the pattern
+        candidates = self.candidates(literal)
+        if len(candidates) == 0:
+            return candidates
+        matches: NDArray[np.bool_] = pd.Series(self.texts(candidates)).str.fullmatch(pattern).to_numpy(dtype=bool)
+        return candidates[matches]
+
+    def refine(self, value_ids: NDArray[np.intp], term: str) -> NDArray[np.intp]:
+        if not len(value_ids):
+            return value_ids
+        return value_ids[self.value_hits(term, value_ids)]
+
+
+def column_index(column: pd.Series, trigrams: bool = True) -> ColumnIndex:
+    # timestamps shown with seconds are indexed by their parts, everything else by its formatted distinct values
+    if is_datetime64_any_dtype(column):
+        fmt = DISPLAY_FORMATS.get(str(column.name), TIMESTAMP_FORMAT)
+        if fmt in (TIMESTAMP_FORMAT, TIME_FORMAT):
+            return TimestampIndex(column, fmt == TIMESTAMP_FORMAT)
+    return ColumnIndex(column, trigrams)
+
+
+class CachedResult(NamedTuple):
+    rows: NDArray[np.intp]
+    # matching distinct values per column, a longer query can only match a subset of them
+    value_ids: dict[str, NDArray[np.intp]]
+
+
+class SearchIndex:
+    def __init__(self, df: pd.DataFrame, columns: list[str], trigrams: bool = True):
+        self.size = len(df)
+        self.columns = {column: column_index(df[column], trigrams) for column in columns}
+        self.results: OrderedDict[tuple[tuple[str, ...], str], CachedResult] = OrderedDict()
+
+    def extended(self, df: pd.DataFrame) -> "SearchIndex":
+        # a copy covering the rows appended to df since this index was built, searches on this one keep working
+        index = copy.copy(self)
+        index.size = len(df)
+        index.columns = {name: column.extended(df[name].iloc[self.size:]) for name, column in self.columns.items()}
+        index.results = OrderedDict()
+        return index
+
+    def search(self, term: str, column: Optional[str] = None) -> NDArray[np.intp]:
+        # row positions whose column (or any indexed column) contains term, case insensitive
+        term = term.lower()
+        if not term:
+            return np.arange(self.size)
+        columns = (column,) if column else tuple(self.columns)
+        key = (columns, term)
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key].rows
+
+        base = self.narrowest_cached(columns, term)
+        if base is None:
+            value_ids = {name: self.columns[name].matching_values(term) for name in columns}
+            mask = np.zeros(self.size, dtype=bool)
+        else:
+            value_ids = {}
+            for name, ids in base.value_ids.items():
+                value_ids[name] = self.columns[name].refine(ids, term)
+            mask = np.zeros(len(base.rows), dtype=bool)
+        for name, ids in value_ids.items():
+            if len(ids):
+                mask |= self.columns[name].row_mask(ids, None if base is None else base.rows)
+        rows = np.flatnonzero(mask) if base is None else base.rows[mask]
+
+        self.results[key] = CachedResult(rows, value_ids)
+        if len(self.results) > RESULT_CACHE_SIZE:
+            self.results.popitem(last=False)
+        return rows
+
+    def narrowest_cached(self, columns: tuple[str, ...], term: str) -> Optional[CachedResult]:
+        # rows matching an extended query are a subset of the rows matching any query it contains
+        best = None
+        for (cached_columns, cached_term), result in self.results.items():
+            if cached_columns == columns and cached_term in term:
+                if best is None or len(result.rows) < len(best.rows):
+                    best = result
+        return best
+
+
+class TimeIndex:
+    # timestamps sorted once, a time window is then two binary searches instead of a scan
+    def __init__(self, column: pd.Series):
+        self.name = column.name
+        values = column.to_numpy(dtype="datetime64[ns]")
+        self.order = np.argsort(values, kind="stable")
+        self.values = values[self.order]
+        # NaT sorts behind every timestamp and never falls into a window
+        self.count = len(values) - int(np.isnat(values).sum())
+
+    def extended(self, column: pd.Series) -> "TimeIndex":
+        # a copy that also covers the rows appended to column, they are merged into the sorted order
+        tail = column.to_numpy(dtype="datetime64[ns]")[len(self.order):]
+        tail_order = np.argsort(tail, kind="stable")
+        tail_values = tail[tail_order]
+        # behind equal timestamps, NaT goes to the very end
+        positions = np.searchsorted(self.values, tail_values, side="right")
+        index = copy.copy(self)
+        index.values = np.insert(self.values, positions, tail_values)
+        index.order = np.insert(self.order, positions, tail_order + len(self.order))
+        index.count = self.count + len(tail) - int(np.isnat(tail).sum())
+        return index
+
+    def bounds(self, start: Optional[np.datetime64] = None, end: Optional[np.datetime64] = None) -> tuple[int, int]:
+        # positions in the sorted order covering start <= t < end, either side may be open
+        values = self.values[:self.count]
+        lower = 0 if start is None else int(np.searchsorted(values, np.datetime64(start, "ns"), side="left"))
+        upper = self.count if end is None else int(np.searchsorted(values, np.datetime64(end, "ns"), side="left"))
+        return lower, max(lower, upper)
+
+    def window(self, start: Optional[np.datetime64] = None, end: Optional[np.datetime64] = None) -> NDArray[np.intp]:
+        # row positions in frame order, ready to combine with search results
+        lower, upper = self.bounds(start, end)
+        return np.sort(self.order[lower:upper])
+
+    def window_mask(self, start: Optional[np.datetime64] = None,
+                    end: Optional[np.datetime64] = None) -> NDArray[np.bool_]:
+        lower, upper = self.bounds(start, end)
+        mask = np.zeros(len(self.order), dtype=bool)
+        mask[self.order[lower:upper]] = True
+        return mask
+
+
+def sort_keys(column: pd.Series) -> tuple[NDArray[Any], NDArray[np.bool_]]:
+    # keys that sort like the typed values and the rows that are shown empty; text sorts by its categories
+    # (case-insensitive) instead of comparing strings per row, negative durations are shown empty as well
+    if is_categorical_dtype(column):
+        categories = column.cat.categories.to_numpy(dtype=str)
+        rank = np.empty(len(categories) + 1, dtype=np.int64)
+        rank[np.argsort(np.char.lower(categories), kind="stable")] = np.arange(len(categories))
+        rank[-1] = len(categories)
+        codes = column.cat.codes.to_numpy()
+        missing = (codes < 0) | (categories[codes] == "") if len(categories) else codes < 0
+        return rank[codes], missing
+    if is_datetime64_any_dtype(column) or is_timedelta64_dtype(column):
+        values = column.to_numpy()
+        missing = np.isnat(values)
+        if is_timedelta64_dtype(column):
+            missing |= values < np.timedelta64(0)
+        return values.view("int64"), missing
+    values = column.to_numpy()
+    return values, np.zeros(len(values), dtype=bool)
+
+
+class SortIndex:
+    # one stable argsort per column on the typed values, computed when the column is first sorted on;
+    # sorting a search result only picks its rows out of the cached order
+    def __init__(self, df: pd.DataFrame, time_indexes: Optional[list[TimeIndex]] = None):
+        self.df = df
+        self.size = len(df)
+        # ascending order per column and how many empty values are at its end
+        self.orders: dict[str, tuple[NDArray[np.intp], int]] = {}
+        self.descending_orders: dict[str, NDArray[np.intp]] = {}
+        for time_index in time_indexes or []:
+            # already sorted for the time windows, NaT at the end
+            self.orders[time_index.name] = time_index.order, len(time_index.order) - time_index.count
+
+    def order(self, column: str, descending: bool = False) -> NDArray[np.intp]:
+        # empty values stay at the end in both directions
+        if column not in self.orders:
+            keys, missing = sort_keys(self.df[column])
+            order = np.argsort(keys, kind="stable")
+            empty = int(missing.sum())
+            if empty:
+                order = np.concatenate([order[~missing[order]], order[missing[order]]])
+            self.orders[column] = order, empty
+        order, empty = self.orders[column]
+        if not descending:
+            return order
+        if column not in self.descending_orders:
+            # the runs of equal values in reverse, rows within a run keep their frame order like a stable sort
+            present = self.size - empty
+            keys = sort_keys(self.df[column])[0][order[:present]]
+            runs = np.cumsum(np.concatenate([[False], keys[1:] != keys[:-1]]))
+            self.descending_orders[column] = np.concatenate([
+                order[:present][np.argsort(-runs, kind="stable")], order[present:]
+            ])
+        return self.descending_orders[column]
+
+    def sorted_rows(self, rows: Union[NDArray[np.intp], range], column: str,
+                    descending: bool = False) -> NDArray[np.intp]:
+        # rows in the order of column, rows may come in any order
+        order = self.order(column, descending)
+        if len(rows) == self.size:
+            return order
+        selected = np.zeros(self.size, dtype=bool)
+        selected[rows] = True
+        sorted_rows: NDArray[np.intp] = order[selected[order]]
+        return sorted_rows
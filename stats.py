@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from parser import format_column, format_duration
+
+# recently shown filters, switching back and forth between a few of them never recomputes
+STATISTICS_CACHE_SIZE = 16
+HOURS = 24
+# visible name of the group column per grouping
+GROUP_NAMES = {
+    "extensions": "Anrufer",
+    "hours"     : "Stunde",
+    "devices"   : "Gerät",
+}
+
+
+class GroupSums(NamedTuple):
+    # one slot per group; sums over disjoint rows add up, so narrowing a filter is a subtraction
+    calls: NDArray[np.number[Any]]
+    unanswered: NDArray[np.number[Any]]
+    talk_seconds: NDArray[np.number[Any]]
+
+    def minus(self, other: "GroupSums") -> "GroupSums":
+        return GroupSums(*(mine - theirs for mine, theirs in zip(self, other)))
+
+
+class CallStatistics(NamedTuple):
+    extensions: GroupSums
+    hours: GroupSums
+    devices: GroupSums
+
+    def minus(self, other: "CallStatistics") -> "CallStatistics":
+        return CallStatistics(*(mine.minus(theirs) for mine, theirs in zip(self, other)))
+
+    @property
+    def calls(self) -> int:
+        return int(self.hours.calls.sum())
+
+    @property
+    def unanswered(self) -> int:
+        return int(self.hours.unanswered.sum())
+
+    @property
+    def talk_time(self) -> pd.Timedelta:
+        return pd.Timedelta(seconds=self.hours.talk_seconds.sum())
+
+
+class Grouping(NamedTuple):
+    # group per row and the label of every group
+    codes: NDArray[np.integer[Any]]
+    labels: NDArray[Any]
+
+
+class Groupings(NamedTuple):
+    # the groups behind the fields of CallStatistics
+    extensions: Grouping
+    hours: Grouping
+    devices: Grouping
+
+
+def category_grouping(column: pd.Series) -> Grouping:
+    # the category codes are the groups, missing values get their own group behind the categories
+    categories = column.cat.categories
+    codes = column.cat.codes.to_numpy()
+    codes = np.where(codes < 0, len(categories), codes).astype(np.int32)
+    return Grouping(codes, np.append(categories.to_numpy(dtype=object), ""))
+
+
+def hours_of_day(column: pd.Series) -> NDArray[np.int8]:
+    values = column.to_numpy()
+    hours: NDArray[np.int8] = ((values - values.astype("datetime64[D]")) // np.timedelta64(1, "h")).astype(np.int8)
+    return hours
+
+
+def talk_seconds(df: pd.DataFrame) -> NDArray[np.float64]:
+    # from connect to disconnect; unanswered calls have the disconnect time as connect time and count 0,
+    # missing disconnect times as well
+    seconds = (df["dateTimeDisconnect"] - df["dateTimeConnect"]).dt.total_seconds().to_numpy()
+    return np.where(seconds > 0, seconds, 0.0)
+
+
+class StatisticsEngine:
+    # calls per extension, per hour of day and talk time per device for the rows of a search, as bincounts
+    # over the category codes; results are cached per search and a search that narrows the previous one
+    # only counts the rows it dropped
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.size = len(df)
+        self.groupings = Groupings(
+            category_grouping(df["callingPartyNumber"]),
+            Grouping(hours_of_day(df["dateTimeOrigination"]), np.arange(HOURS)),
+            category_grouping(df["origDeviceName"]),
+        )
+        self.unanswered = ~df["connected"].to_numpy(dtype=bool)
+        self.talk_seconds = talk_seconds(df)
+        self.cache: OrderedDict[str, CallStatistics] = OrderedDict()
+        self.last: Optional[tuple[NDArray[np.intp], CallStatistics]] = None
+
+    def summarize(self, rows: Optional[NDArray[np.intp]] = None) -> CallStatistics:
+        # all rows without rows, the positions are unique like QueryEngine returns them
+        unanswered = self.unanswered if rows is None else self.unanswered[rows]
+        seconds = self.talk_seconds if rows is None else self.talk_seconds[rows]
+        sums = []
+        for grouping in self.groupings:
+            codes = grouping.codes if rows is None else grouping.codes[rows]
+            groups = len(grouping.labels)
+            sums.append(GroupSums(
+                np.bincount(codes, minlength=groups),
+                np.bincount(codes, weights=unanswered, minlength=groups).astype(np.int64),
+                np.bincount(codes, weights=seconds, minlength=groups),
+            ))
+        return CallStatistics(*sums)
+
+    def narrowed(self, rows: NDArray[np.intp]) -> Optional[CallStatistics]:
+        # None unless rows are a subset of the previous rows and dropping is less work than counting
+        if self.last is None or len(rows) > len(self.last[0]):
+            return None
+        previous_rows, previous = self.last
+        kept = np.zeros(self.size, dtype=bool)
+        kept[rows] = True
+        dropped = previous_rows[~kept[previous_rows]]
+        if len(previous_rows) - len(dropped) != len(rows) or len(dropped) >= len(rows):
+            return None
+        return previous.minus(self.summarize(dropped))
+
+    def statistics(self, query: str, rows: NDArray[np.intp]) -> CallStatistics:
+        # query is the search that selected rows on this frame, it is the cache key
+        statistics = self.cache.get(query)
+        if statistics is None:
+            statistics = self.narrowed(rows)
+            if statistics is None:
+                statistics = self.summarize(None if len(rows) == self.size else rows)
+            self.cache[query] = statistics
+            if len(self.cache) > STATISTICS_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        self.cache.move_to_end(query)
+        self.last = rows, statistics
+        return statistics
+
+    def table(self, statistics: CallStatistics, grouping: str) -> pd.DataFrame:
+        # one row per group with calls, unanswered calls, total and average talk time of the answered calls;
+        # hours keep all 24 rows, the other groupings only the groups with calls, most calls first
+        sums = getattr(statistics, grouping)
+        answered = sums.calls - sums.unanswered
+        average = np.divide(sums.talk_seconds, answered, out=np.zeros(len(answered)), where=answered > 0)
+        table = pd.DataFrame({
+            GROUP_NAMES[grouping]: getattr(self.groupings, grouping).labels,
+            "Anrufe"             : sums.calls,
+            "Unbeantwortet"      : sums.unanswered,
+            "Gesprächszeit"      : pd.to_timedelta(sums.talk_seconds, unit="s"),
+            "Ø Gesprächszeit"    : pd.to_timedelta(average.round(), unit="s"),
+        })
+        if grouping == "hours":
+            return table
+        table = table[table["Anrufe"] > 0]
+        return table.sort_values("Anrufe", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def convert_statistics_table(table: pd.DataFrame) -> tuple[list[str], list[tuple[str, ...]]]:
+    # column names and text rows for a data table, talk times as HH:MM:SS like the call table shows durations
+    formatted = pd.DataFrame({name: format_column(name, table[name]) for name in table.columns})
+    if "Stunde" in formatted:
+        formatted["Stunde"] = formatted["Stunde"].map("{:02d}:00".format)
+    return list(formatted.columns), list(formatted.astype(str).itertuples(index=False, name=None))
+
+
+def describe(statistics: CallStatistics) -> str:
+    talk_time = format_duration(pd.Series([statistics.talk_time]))[0]
+    return f"{statistics.calls} Anrufe, davon {statistics.unanswered} unbeantwortet, Gesprächszeit {talk_time}"
@@ -0,0 +1,246 @@
+import json
+import os
+import shutil
+import uuid
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+from pandas.api.types import is_categorical_dtype
+
+from cache import CACHE_DIR, cache_key
+from parser import (CHUNK_SIZE_SAMPLE, DECODE_ERRORS, MIN_CHUNK_SIZE, PARSER_VERSION, read_header, read_with_time_text,
+                    row_width, rows_per_budget, sniff_file, transform_chunk)
+from progress import Hook, LoadProgress
+from query import QueryEngine
+from search import SearchIndex, TimeIndex
+
+# files too big for memory are converted once into one raw binary file per column and used memory mapped;
+# searches build their index for one block of rows at a time
+STORE_DIR = os.path.join(CACHE_DIR, "store")
+META_FILE = "meta.json"
+# ceiling for a load or a search, in MB through the environment
+MEMORY_LIMIT = int(os.environ.get("CDR_VIEWER_MEMORY_LIMIT", 1024)) * 1024 ** 2
+# a full in-memory load peaks at about this multiple of the file size
+LOAD_MEMORY_FACTOR = 1.5
+# the search index the GUI builds right after the load, with its temporaries, per row
+INDEX_BYTES_PER_ROW = 150
+# a block with its search index, formatted values and the query masks takes about this multiple of its raw columns
+SEARCH_MEMORY_FACTOR = 64
+MIN_BLOCK_ROWS = 10_000
+
+
+def estimated_load_memory(csv_file: str) -> int:
+    # load plus search index, the rows are estimated from the first lines
+    size = os.path.getsize(csv_file)
+    with open(csv_file, "rb") as f:
+        rows = size / row_width(f.read(CHUNK_SIZE_SAMPLE))
+    return int(size * LOAD_MEMORY_FACTOR + rows * INDEX_BYTES_PER_ROW)
+
+
+def needs_store(csv_file: str, memory_limit: int = MEMORY_LIMIT) -> bool:
+    return estimated_load_memory(csv_file) > memory_limit
+
+
+def column_layout(series: pd.Series) -> tuple[str, str]:
+    # (kind, numpy dtype of the raw file); categoricals are stored as codes into one dictionary per column
+    if is_categorical_dtype(series):
+        return "category", "int32"
+    if series.dtype.kind in "mM":
+        return str(series.dtype), "int64"
+    return "values", series.dtype.str
+
+
+class ColumnStore:
+    # the columns of a converted file, memory mapped; take() builds a small frame like the in-memory loader does
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.size: int = meta["rows"]
+        self.columns: list[dict[str, Any]] = meta["columns"]
+        self.data = {column["name"]: self.map(column["file"], column["dtype"]) for column in self.columns}
+        self.categories = {
+            column["name"]: np.load(os.path.join(directory, column["categories"]), mmap_mode="r")
+            for column in self.columns if column["kind"] == "category"
+        }
+
+    def map(self, name: str, dtype: str) -> NDArray[Any]:
+        if self.size == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.directory, name), dtype=dtype, mode="r", shape=(self.size,))
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def row_bytes(self) -> int:
+        return sum(values.dtype.itemsize for values in self.data.values())
+
+    def block(self, start: int, end: int) -> pd.DataFrame:
+        return self.frame(slice(start, end))
+
+    def take(self, positions: Union[NDArray[np.intp], range, list[int]]) -> pd.DataFrame:
+        # same call as DataFrame.take, so PagedTable pages and exports work on both
+        return self.frame(np.asarray(positions, dtype=np.int64))
+
+    def frame(self, rows: Union[slice, NDArray[np.intp]]) -> pd.DataFrame:
+        columns = {}
+        for column in self.columns:
+            values = np.asarray(self.data[column["name"]][rows])
+            if column["kind"] == "category":
+                # only the categories this block uses, the dictionary itself can be big
+                used = np.unique(values[values >= 0])
+                categories = np.asarray(self.categories[column["name"]][used]).astype(object)
+                codes = np.where(values >= 0, np.searchsorted(used, values), -1)
+                values = pd.Categorical.from_codes(codes, categories=categories)
+            elif column["kind"] != "values":
+                values = values.view(column["kind"])
+            columns[column["name"]] = values
+        return pd.DataFrame(columns)
+
+
+class StoreEngine:
+    # QueryEngine for a ColumnStore, every block of rows is searched with its own engine and index
+    def __init__(self, store: ColumnStore, columns: dict[str, str], memory_limit: int = MEMORY_LIMIT):
+        self.store = store
+        self.columns = columns
+        self.size = len(store)
+        self.block_rows = max(MIN_BLOCK_ROWS, memory_limit // (store.row_bytes * SEARCH_MEMORY_FACTOR))
+
+    def search(self, text: str, check: Optional[Callable[[], None]] = None) -> Union[NDArray[np.intp], range]:
+        # row positions like QueryEngine.search; check is called between blocks and may raise to stop the scan
+        if not text.strip():
+            return range(self.size)
+        hits = []
+        for start in range(0, self.size, self.block_rows):
+            if check is not None:
+                check()
+            frame = self.store.block(start, start + self.block_rows)
+            # the index lives for one search only, comparing the distinct values beats building trigrams
+            engine = QueryEngine(frame, SearchIndex(frame, list(self.columns.values()), trigrams=False), self.columns,
+                                 [TimeIndex(frame["dateTimeOrigination"])])
+            hits.append(engine.search(text) + start)
+        return np.concatenate(hits) if hits else np.empty(0, dtype=np.int64)
+
+
+class ColumnWriter:
+    def __init__(self, directory: str, source: str):
+        self.directory = directory
+        self.source = source
+        self.files: dict[str, Any] = {}
+        self.columns: list[dict[str, Any]] = []
+        # value -> code per categorical column, chunks bring their own categories
+        self.dictionaries: dict[str, dict[str, int]] = {}
+        self.rows = 0
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if not self.columns:
+            for i, name in enumerate(chunk.columns):
+                kind, dtype = column_layout(chunk[name])
+                self.columns.append({"name": name, "kind": kind, "dtype": dtype, "file": f"{i}.bin"})
+                self.files[name] = open(os.path.join(self.directory, f"{i}.bin"), "wb")
+                if kind == "category":
+                    self.columns[-1]["categories"] = f"{i}.categories.npy"
+                    self.dictionaries[name] = {}
+        for column in self.columns:
+            series = chunk[column["name"]]
+            if column["kind"] == "category":
+                dictionary = self.dictionaries[column["name"]]
+                codes = np.array([dictionary.setdefault(value, len(dictionary))
+                                  for value in series.cat.categories.tolist()] + [-1], dtype=np.int32)
+                values = codes[series.cat.codes.to_numpy()]
+            else:
+                values = series.to_numpy()
+                if column["kind"] != "values":
+                    values = values.view("int64")
+            np.ascontiguousarray(values, dtype=column["dtype"]).tofile(self.files[column["name"]])
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        for f in self.files.values():
+            f.close()
+        for column in self.columns:
+            if column["kind"] == "category":
+                categories = np.asarray(list(self.dictionaries[column["name"]]), dtype=str)
+                np.save(os.path.join(self.directory, column["categories"]), categories, allow_pickle=False)
+        with open(os.path.join(self.directory, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "rows": self.rows, "columns": self.columns}, f)
+
+
+def build_store(csv_file: str, directory: str, progress: LoadProgress, memory_limit: int = MEMORY_LIMIT) -> None:
+    # one pass over the file, chunks sized to the memory limit; written into a temporary directory first
+    with progress.stage("sniff"):
+        encoding, dialect = sniff_file(csv_file)
+        names = read_header(csv_file, dialect.delimiter, encoding)
+        with open(csv_file, "rb") as f:
+            sample = f.read(CHUNK_SIZE_SAMPLE)
+    chunk_size = max(MIN_CHUNK_SIZE, rows_per_budget(row_width(sample), memory_limit // 4))
+
+    def write(columns: dict[str, str]) -> None:
+        staging = f"{directory}.{uuid.uuid4().hex}"
+        os.makedirs(staging)
+        writer = ColumnWriter(staging, os.path.abspath(csv_file))
+        try:
+            with open(csv_file, "rb") as f:
+                reader = pd.read_csv(  # type: ignore
+                    f, chunksize=chunk_size, usecols=[*columns], dtype=columns, delimiter=dialect.delimiter,
+                    encoding=encoding, encoding_errors=DECODE_ERRORS
+                )
+                chunk_iter = iter(reader)
+                while True:
+                    with progress.stage("read"):
+                        chunk = next(chunk_iter, None)
+                    if chunk is None:
+                        break
+                    chunk = transform_chunk(chunk, progress)
+                    with progress.stage("store"):
+                        writer.write(chunk)
+                    progress.advance(f.tell(), len(chunk))
+            writer.close()
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(staging, directory)
+        except BaseException:
+            # failed or cancelled from a progress hook
+            for f in writer.files.values():
+                f.close()
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    read_with_time_text(write, names, progress)
+
+
+def remove_stale_stores(csv_file: str, keep: str, store_dir: str = STORE_DIR) -> None:
+    # stores of older versions of the same file are never used again and take as much disk as the file
+    source = os.path.abspath(csv_file)
+    for name in os.listdir(store_dir):
+        path = os.path.join(store_dir, name)
+        if path == keep or not os.path.isdir(path):
+            continue
+        try:
+            with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+                stale = json.load(f).get("source") == source
+        except (OSError, ValueError):
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def open_store(csv_file: str, callback: Any = None, memory_limit: int = MEMORY_LIMIT,
+               hooks: Optional[list[Hook]] = None, store_dir: str = STORE_DIR) -> ColumnStore:
+    # converts the file on first use, later opens of the unchanged file map the existing store right away
+    text_hooks = [lambda event: callback(event.message)] if callback else []
+    progress = LoadProgress(os.path.getsize(csv_file), [*text_hooks, *(hooks or [])])
+    directory = os.path.join(store_dir, cache_key(csv_file, PARSER_VERSION))
+    if not os.path.exists(os.path.join(directory, META_FILE)):
+        progress.emit("sniff")
+        os.makedirs(store_dir, exist_ok=True)
+        build_store(csv_file, directory, progress, memory_limit)
+        remove_stale_stores(csv_file, directory, store_dir)
+    else:
+        progress.emit("cache")
+    store = ColumnStore(directory)
+    progress.rows = len(store)
+    progress.emit("done")
+    return store
@@ -0,0 +1,72 @@
+from typing import TYPE_CHECKING, Any, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from parser import convert_to_table
+from search import SortIndex
+
+if TYPE_CHECKING:
+    from store import ColumnStore
+
+PAGE_SIZE = 50
+EXPORT_BATCH_SIZE = 5_000
+
+
+class PagedTable:
+    # keeps row positions into the frame (or a ColumnStore) and only formats the page that is shown
+    def __init__(self, df: Union[pd.DataFrame, "ColumnStore"], rows: Optional[Union[NDArray[np.intp], range]] = None,
+                 page_size: int = PAGE_SIZE, query: str = ""):
+        self.df = df
+        self.rows: Union[NDArray[np.intp], range] = np.arange(len(df)) if rows is None else rows
+        # the search that selected rows, statistics are cached under it
+        self.query = query
+        # (column, descending) once sorted, otherwise the rows keep the order of the frame
+        self.sort_order: Optional[tuple[str, bool]] = None
+        self.page_size = page_size
+        self.page = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.rows) // self.page_size))
+
+    @property
+    def column_data(self) -> list[tuple[str, float]]:
+        return convert_to_table(self.df.take([]))[0]
+
+    def sorted(self, sort_index: SortIndex, column: str, descending: bool = False) -> "PagedTable":
+        # a sorted copy starting on the first page, the cached order of the column makes this a single pass
+        table = PagedTable(self.df, sort_index.sorted_rows(self.rows, column, descending), self.page_size, self.query)
+        table.sort_order = column, descending
+        return table
+
+    def set_page(self, page: int) -> None:
+        self.page = min(max(page, 0), self.page_count - 1)
+
+    def page_bounds(self) -> tuple[int, int]:
+        start = self.page * self.page_size
+        return start, min(start + self.page_size, len(self.rows))
+
+    def page_rows(self) -> list[tuple[Any, ...]]:
+        start, end = self.page_bounds()
+        rows: list[tuple[Any, ...]] = convert_to_table(self.df.take(self.rows[start:end]))[1].tolist()
+        return rows
+
+    def page_label(self) -> str:
+        start, end = self.page_bounds()
+        return f"{start + 1 if end else 0}-{end} von {len(self.rows)}"
+
+    def has_previous(self) -> bool:
+        return self.page > 0
+
+    def has_next(self) -> bool:
+        return self.page < self.page_count - 1
+
+    def iter_rows(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Any]:
+        # formats one batch at a time so exports never hold the whole result as rows
+        for start in range(0, len(self.rows), batch_size):
+            yield from convert_to_table(self.df.take(self.rows[start:start + batch_size]))[1]
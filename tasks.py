@@ -0,0 +1,87 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("cdr_viewer.tasks")
+
+
+class Cancelled(BaseException):
+    # BaseException like asyncio.CancelledError, so "except Exception" error handling in the loader lets it through
+    pass
+
+
+class CancelToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self, *args: Any) -> None:
+        # usable as a progress hook, the long running work stops at its next checkpoint
+        if self._event.is_set():
+            raise Cancelled()
+
+
+class TaskScheduler:
+    # one worker thread per kind of task ("load", "search", ...): a new task cancels the previous one of its kind,
+    # queued tasks that got cancelled never start and results of cancelled tasks are dropped; results and errors
+    # are handed to dispatch, which runs them on the UI thread
+    def __init__(self, dispatch: Callable[[Callable[[], None]], None]):
+        self.dispatch = dispatch
+        self.executors: dict[str, ThreadPoolExecutor] = {}
+        self.tokens: dict[str, CancelToken] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind: str, work: Callable[[CancelToken], Any], on_done: Callable[[Any], None],
+               on_error: Optional[Callable[[Exception], None]] = None) -> CancelToken:
+        token = CancelToken()
+        with self.lock:
+            previous = self.tokens.get(kind)
+            if previous is not None:
+                previous.cancel()
+            self.tokens[kind] = token
+            if kind not in self.executors:
+                self.executors[kind] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=kind)
+            executor = self.executors[kind]
+        executor.submit(self.run, token, work, on_done, on_error)
+        return token
+
+    def run(self, token: CancelToken, work: Callable[[CancelToken], Any], on_done: Callable[[Any], None],
+            on_error: Optional[Callable[[Exception], None]]) -> None:
+        if token.cancelled:
+            return
+        try:
+            result = work(token)
+        except Cancelled:
+            return
+        except Exception as e:
+            if token.cancelled:
+                return
+            if on_error is None:
+                logger.exception("background task failed")
+                return
+            self.dispatch(lambda: on_error(e) if not token.cancelled else None)
+            return
+        # checked again on the UI thread, a newer task may have been submitted in between
+        self.dispatch(lambda: on_done(result) if not token.cancelled else None)
+
+    def cancel(self, kind: str) -> None:
+        with self.lock:
+            token = self.tokens.pop(kind, None)
+        if token is not None:
+            token.cancel()
+
+    def shutdown(self) -> None:
+        with self.lock:
+            for token in self.tokens.values():
+                token.cancel()
+            self.tokens.clear()
+            for executor in self.executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.executors.clear()
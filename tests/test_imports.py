@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# pandas alone takes about 0.4 s, the budget leaves room for slow machines but not for Kivy or reportlab
+IMPORT_BUDGET_SECONDS = 1.5
+HEAVY_MODULES = ("kivy", "kivymd", "reportlab", "tkinter")
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}}))
+"""
+
+
+def import_fresh(module):
+    # a fresh interpreter, modules imported by earlier tests must not hide the cost
+    result = subprocess.run([sys.executable, "-c", SCRIPT.format(module=module)], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize("module", ["parser", "cli"])
+def test_import_skips_heavy_modules(module):
+    modules = import_fresh(module)["modules"]
+    assert [name for name in HEAVY_MODULES if name in modules] == []
+
+
+@pytest.mark.parametrize("module", ["parser", "cli"])
+def test_import_stays_within_budget(module):
+    # the best of a few runs, a single run on a busy machine says little
+    seconds = min(import_fresh(module)["seconds"] for _ in range(3))
+    assert seconds < IMPORT_BUDGET_SECONDS
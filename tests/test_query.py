@@ -0,0 +1,37 @@
+import pytest
+
+from parser import column_name_mapping, load_data
+from query import QueryEngine
+from search import SearchIndex, TimeIndex
+
+# connect times 10:05, 09:10 and 11:10 local time, devices with sep at the start, in the middle and not at all
+FIXTURE = """\
+dateTimeOrigination;callingPartyNumber;callingPartyUnicodeLoginUserID;originalCalledPartyNumber;\
+finalCalledPartyUnicodeLoginUserID;dateTimeConnect;dateTimeDisconnect;origDeviceName
+1705309500;"1001";"";"2001";"";1705309500;1705309800;"SEP001122334455"
+1705306200;"1002";"";"2002";"";1705306200;1705306500;"CSFSEP01"
+1705313400;"1010";"";"2003";"";1705313400;1705313700;"ATA0011"
+"""
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    path = tmp_path_factory.mktemp("query") / "fixture.csv"
+    path.write_text(FIXTURE, encoding="utf-8")
+    df, error_message = load_data(str(path), None, as_dataframe=True, use_cache=False, workers=1)
+    assert error_message is None
+    return QueryEngine(df, SearchIndex(df, list(column_name_mapping.values())), column_name_mapping,
+                       [TimeIndex(df["dateTimeOrigination"])])
+
+
+@pytest.mark.parametrize("query, rows", [
+    ("Verbunden um:10:*", [0]),
+    ("Verbunden um:*10:*", [0, 1, 2]),
+    ("Verbunden um:??:10:00", [1, 2]),
+    ("Gerät:sep*", [0]),
+    ("Gerät:*sep*", [0, 1]),
+    ("Anrufer:100?", [0, 1]),
+    ("Anrufer:*0", [2]),
+])
+def test_wildcards_cover_the_whole_value(engine, query, rows):
+    assert engine.search(query).tolist() == rows
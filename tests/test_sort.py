@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from search import SortIndex
+
+FRAME = pd.DataFrame({
+    "origDeviceName": pd.Categorical(["b", "A", "", "c", "b", None, "c", "D"]),
+    "duration": pd.to_timedelta([30, 10, 30, None, 20, 10, -5, 30], unit="s"),
+})
+
+
+def expected(column, descending):
+    # pandas with a stable sort, empty values at the end in both directions
+    values = FRAME[column]
+    if column == "origDeviceName":
+        missing = values.isna() | (values.astype(str) == "")
+        values = values.astype(str).str.lower()
+    else:
+        missing = values.isna() | (values < pd.Timedelta(0))
+    present = values[~missing].sort_values(ascending=not descending, kind="stable")
+    return [*present.index, *values[missing].index]
+
+
+@pytest.mark.parametrize("column", ["origDeviceName", "duration"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_order_keeps_ties_in_frame_order(column, descending):
+    assert SortIndex(FRAME).order(column, descending).tolist() == expected(column, descending)
+
+
+def test_sorted_rows_picks_rows_out_of_the_order():
+    rows = np.array([7, 0, 2, 4])
+    assert SortIndex(FRAME).sorted_rows(rows, "duration", True).tolist() == [0, 2, 7, 4]
@@ -0,0 +1,41 @@
+import calendar
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import pytest
+
+from parser import to_local_time
+
+YEARS = range(2015, 2031)
+
+
+def last_sunday(year, month):
+    day = calendar.monthrange(year, month)[1]
+    return day - (calendar.weekday(year, month, day) - calendar.SUNDAY) % 7
+
+
+def switch_times(year):
+    # both switches happen at 01:00 UTC, a few hours around them in steps that hit both edges exactly
+    for month in (3, 10):
+        switch = datetime(year, month, last_sunday(year, month), 1)
+        yield from (switch + timedelta(seconds=seconds) for seconds in range(-3 * 3600, 3 * 3600 + 1, 30))
+
+
+@pytest.mark.parametrize("year", YEARS)
+def test_to_local_time_matches_zoneinfo_around_switches(year):
+    utc = list(switch_times(year))
+    berlin = ZoneInfo("Europe/Berlin")
+    expected = [time.replace(tzinfo=timezone.utc).astimezone(berlin).replace(tzinfo=None) for time in utc]
+    local, = to_local_time(pd.Series(pd.to_datetime(utc)))
+    assert local.tolist() == [pd.Timestamp(time) for time in expected]
+
+
+def test_to_local_time_keeps_missing_values_and_columns_apart():
+    first = pd.Series(pd.to_datetime(["2024-03-31 00:59:59", None]), index=[3, 4])
+    second = pd.Series(pd.to_datetime(["2024-10-27 01:00:00"]), index=[7])
+    local_first, local_second = to_local_time(first, second)
+    assert local_first.index.tolist() == [3, 4]
+    assert local_first.tolist()[0] == pd.Timestamp("2024-03-31 01:59:59")
+    assert pd.isna(local_first.tolist()[1])
+    assert local_second.tolist() == [pd.Timestamp("2024-10-27 02:00:00")]
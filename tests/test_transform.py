@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+from pandas._libs.tslibs.timestamps import Timestamp
+
+from parser import format_for_display, load_data
+
+# winter and summer days away from the switch days, the old transform hard coded the dates of the switches;
+# durations below a day and every call with a disconnect time, the old transform showed neither correctly
+FIXTURE = """\
+cdrRecordType;globalCallID_callId;dateTimeOrigination;callingPartyNumber;callingPartyUnicodeLoginUserID;\
+originalCalledPartyNumber;finalCalledPartyUnicodeLoginUserID;dateTimeConnect;dateTimeDisconnect;origDeviceName
+1;101;1705312800;"1001";"mueller";"+4930123456";"schmidt";1705312805;1705313100;"SEP001122334455"
+1;102;1705316400;"1002";"";"4,91761E+11";"x";0;1705316430;"SEP001122334456"
+1;103;1720605600;"\\";"meier";"1003";"";1720605660;1720609200;"SEP001122334457"
+1;104;1720609200;"+491701234567";"schulz";"0";"müller";1720609201;1720695599;"\\"
+1;105;1701424800;"1005";"meier";"1001";"mueller";0;1701424800;"A"
+1;106;1701428400;"1,23456E+5";"";"*99";"";1701428401;1701428402;"SEP001122334458"
+"""
+# the old reader passed a dtype and a converter for the same columns
+pytestmark = pytest.mark.filterwarnings("ignore::pandas.errors.ParserWarning")
+COLUMNS = ["dateTimeOrigination", "callingPartyNumber", "callingPartyUnicodeLoginUserID", "originalCalledPartyNumber",
+           "finalCalledPartyUnicodeLoginUserID", "dateTimeConnect", "dateTimeDisconnect", "origDeviceName", "duration"]
+
+
+# frozen copy of the row-wise transform before it was vectorized, only DataFrame.append became pd.concat
+
+
+def convert_empty_category(val):
+    if len(val) < 2 or "\\" in val or val is None:
+        return ""
+    elif "E+" in val:
+        # Replace comma with period and convert to float
+        if "," in val:
+            val = float(val.replace(",", "."))
+        return "+" + str(int(val))
+    else:
+        return val
+
+
+def convert_empty_time(val):
+    if pd.isna(val):
+        return ""
+    try:
+        # If it's a Unix timestamp, convert to datetime
+        timestamp = pd.to_datetime(val, unit="s")
+    except ValueError:
+        # If it's a datetime string, parse it directly
+        timestamp = pd.to_datetime(val)
+    return timestamp
+
+
+def check_date_time_connect(val):
+    if pd.isna(val):
+        return True
+    # check if val is a string formatted timestamp with unix time 0
+    if isinstance(val, Timestamp) and val.year == 1970:
+        return True
+
+
+def adjust_to_berlin_time(dt):
+    if dt.year <= 2021:
+        dst_start = pd.to_datetime(f"{dt.year}-03-28 01:00:00")
+        dst_end = pd.to_datetime(f"{dt.year}-10-31 01:00:00")
+    else:
+        dst_start = pd.to_datetime(f"{dt.year}-03-27 01:00:00")
+        dst_end = pd.to_datetime(f"{dt.year}-10-30 01:00:00")
+
+    if dst_start <= dt < dst_end:
+        return dt + timedelta(hours=2)  # Add 2 hours for daylight saving time
+    else:
+        return dt + timedelta(hours=1)  # Add 1 hour for standard time
+
+
+def process_chunks(reader):
+    df = pd.DataFrame()
+    for chunk in reader:
+        chunk = chunk.dropna(subset=["dateTimeOrigination"])
+        chunk["dateTimeConnect"] = chunk.apply(
+            lambda x: x["dateTimeDisconnect"] if check_date_time_connect(x["dateTimeConnect"]) else x["dateTimeConnect"], axis=1)
+        chunk["duration"] = chunk["dateTimeDisconnect"] - chunk["dateTimeOrigination"]
+        chunk["duration"] = chunk["duration"].apply(
+            lambda x: "" if pd.isna(x) else f"{x.seconds // 3600:02d}:{x.seconds % 3600 // 60:02d}:{x.seconds % 60:02d}"
+        )
+        chunk["dateTimeOrigination"] = chunk["dateTimeOrigination"].apply(lambda x: pd.to_datetime(x, unit='s'))
+        chunk["dateTimeConnect"] = chunk["dateTimeConnect"].apply(lambda x: pd.to_datetime(x, unit='s'))
+        chunk["dateTimeDisconnect"] = chunk["dateTimeDisconnect"].apply(lambda x: pd.to_datetime(x, unit='s'))
+        chunk["dateTimeOrigination"] = chunk["dateTimeOrigination"].apply(adjust_to_berlin_time)
+        chunk["dateTimeConnect"] = chunk["dateTimeConnect"].apply(adjust_to_berlin_time)
+        chunk["dateTimeDisconnect"] = chunk["dateTimeDisconnect"].apply(adjust_to_berlin_time)
+        chunk["dateTimeOrigination"] = chunk["dateTimeOrigination"].apply(lambda x: x.strftime("%d.%m.%y %H:%M:%S"))
+        chunk["dateTimeConnect"] = chunk["dateTimeConnect"].apply(lambda x: x.strftime("%H:%M:%S"))
+        chunk["dateTimeDisconnect"] = chunk["dateTimeDisconnect"].apply(lambda x: x.strftime("%d.%m.%y %H:%M:%S"))
+        df = pd.concat([df, chunk])
+    return df
+
+
+def load_old(csv_file):
+    req_cols = {
+        "dateTimeOrigination"               : "uint32",
+        "callingPartyNumber"                : "str",
+        "callingPartyUnicodeLoginUserID"    : "str",
+        "originalCalledPartyNumber"         : "str",
+        "finalCalledPartyUnicodeLoginUserID": "str",
+        "dateTimeConnect"                   : "uint32",
+        "dateTimeDisconnect"                : "uint32",
+        "origDeviceName"                    : "str",
+    }
+    converters = {
+        "callingPartyUnicodeLoginUserID"    : convert_empty_category,
+        "finalCalledPartyUnicodeLoginUserID": convert_empty_category,
+        "origDeviceName"                    : convert_empty_category,
+        "callingPartyNumber"                : convert_empty_category,
+        "originalCalledPartyNumber"         : convert_empty_category,
+        "dateTimeOrigination"               : convert_empty_time,
+        "dateTimeConnect"                   : convert_empty_time,
+        "dateTimeDisconnect"                : convert_empty_time,
+    }
+    return process_chunks(pd.read_csv(
+        csv_file, chunksize=16, usecols=[*req_cols], dtype=req_cols, converters=converters, delimiter=";"
+    ))
+
+
+@pytest.fixture(scope="module")
+def frames(tmp_path_factory):
+    path = tmp_path_factory.mktemp("transform") / "fixture.csv"
+    path.write_text(FIXTURE, encoding="utf-8")
+    df, error_message = load_data(str(path), None, as_dataframe=True, use_cache=False, workers=1)
+    assert error_message is None
+    return load_old(str(path)), format_for_display(df)
+
+
+def test_transform_keeps_rows(frames):
+    old, new = frames
+    assert list(new.index) == list(old.index)
+
+
+@pytest.mark.parametrize("column", COLUMNS)
+def test_transform_matches_row_wise_transform(frames, column):
+    old, new = frames
+    assert new[column].astype(str).tolist() == old[column].astype(str).tolist()